@@ -0,0 +1,97 @@
+"""Automatic tuning of chunk sizes towards a target launch latency"""
+
+import json
+import os
+import threading
+import time
+
+from platformdirs import user_config_dir
+
+PROFILE_PATH = os.path.join(user_config_dir("pla-reverse-gui", False), "autotune.json")
+# seconds per launch, long enough to hide launch overhead
+# and well under the ~2s display driver watchdog
+TARGET_LATENCY = 0.25
+# largest factor a chunk size changes by after a single measurement
+MAX_GROWTH = 4
+_PROFILE_LOCK = threading.Lock()
+
+
+def load_profile() -> dict[str, float]:
+    """Load the measured throughput (work items/s) of every device and stage"""
+    try:
+        with open(PROFILE_PATH, "r", encoding="utf-8") as profile_file:
+            profile = json.load(profile_file)
+        return profile if isinstance(profile, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_throughput(key: str, throughput: float) -> None:
+    """Save the measured throughput of a device and stage"""
+    with _PROFILE_LOCK:
+        profile = load_profile()
+        profile[key] = throughput
+        try:
+            os.makedirs(os.path.dirname(PROFILE_PATH), exist_ok=True)
+            with open(PROFILE_PATH, "w", encoding="utf-8") as profile_file:
+                json.dump(profile, profile_file, indent=2)
+        except OSError:
+            pass
+
+
+class ChunkTuner:
+    """
+    Resizes chunks of one device so that each launch takes about TARGET_LATENCY
+    Launches are timed by the gap between completions, which is the launch's runtime
+    while launches are queued back to back
+    """
+
+    def __init__(
+        self,
+        key: str,
+        work_per_unit: int,
+        initial_chunk_size: int,
+        maximum_chunk_size: int,
+        target_latency: float = TARGET_LATENCY,
+    ) -> None:
+        self.key = key
+        self.work_per_unit = work_per_unit
+        self.maximum_chunk_size = max(maximum_chunk_size, 1)
+        self.target_latency = target_latency
+        # work items per second, remembered from previous runs on this device
+        self.throughput: float = load_profile().get(key)
+        self.chunk_size = max(initial_chunk_size, 1)
+        if self.throughput:
+            self.chunk_size = self.size_for(self.throughput)
+        self.last_completion: float = None
+
+    def size_for(self, throughput: float) -> int:
+        """Chunk size that takes target_latency at a throughput"""
+        size = round(throughput * self.target_latency / self.work_per_unit)
+        return min(max(size, 1), self.maximum_chunk_size)
+
+    def start(self) -> None:
+        """Start timing, called before the first launch"""
+        if self.last_completion is None:
+            self.last_completion = time.perf_counter()
+
+    def record(self, size: int) -> None:
+        """Record the completion of a chunk and resize later chunks"""
+        now = time.perf_counter()
+        elapsed = now - self.last_completion
+        self.last_completion = now
+        if elapsed <= 0:
+            return
+        sample = size * self.work_per_unit / elapsed
+        self.throughput = (
+            sample if self.throughput is None else (self.throughput + sample) / 2
+        )
+        self.chunk_size = min(
+            max(self.size_for(self.throughput), self.chunk_size // MAX_GROWTH, 1),
+            self.chunk_size * MAX_GROWTH,
+        )
+
+    def save(self) -> None:
+        """Remember the measured throughput for the next run on this device"""
+        if self.throughput:
+            save_throughput(self.key, self.throughput)
@@ -0,0 +1,160 @@
+"""Checkpoints of long running chunked searches"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+from platformdirs import user_cache_dir
+
+CHECKPOINT_DIRECTORY = os.path.join(
+    user_cache_dir("pla-reverse-gui", False), "checkpoints"
+)
+# seconds between checkpoints of a running search
+CHECKPOINT_INTERVAL = 60
+# seconds before an untouched checkpoint is removed
+CHECKPOINT_LIFETIME = 7 * 24 * 60 * 60
+
+
+def checkpoint_key(stage: str, *inputs) -> str:
+    """Hash a stage and every input that determines its results"""
+    hasher = hashlib.sha256(stage.encode())
+    for search_input in inputs:
+        if isinstance(search_input, np.ndarray):
+            hasher.update(search_input.tobytes())
+        else:
+            hasher.update(repr(search_input).encode())
+    return hasher.hexdigest()
+
+
+def remove_expired() -> None:
+    """Remove checkpoints that have not been touched in CHECKPOINT_LIFETIME"""
+    now = time.time()
+    for entry in os.scandir(CHECKPOINT_DIRECTORY):
+        if entry.is_file() and now - entry.stat().st_mtime > CHECKPOINT_LIFETIME:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+class Checkpoint:
+    """
+    Periodically saved progress of a chunked search
+    Every worker (device) reports the chunks it completed and the results of those chunks
+    """
+
+    def __init__(self, stage: str, key: str) -> None:
+        self.stage = stage
+        self.key = key
+        self.lock = threading.Lock()
+        self.completed_chunks: dict[str, list[tuple[int, int]]] = {}
+        self.results: dict[str, np.ndarray] = {}
+        self.complete = False
+        self.last_save = time.monotonic()
+        base_path = os.path.join(CHECKPOINT_DIRECTORY, key)
+        self.metadata_path = f"{base_path}.json"
+        self.results_path = f"{base_path}.npy"
+
+    @classmethod
+    def load(cls, stage: str, key: str) -> "Checkpoint":
+        """Load the checkpoint of a search, None if there is none"""
+        checkpoint = cls(stage, key)
+        try:
+            with open(checkpoint.metadata_path, "r", encoding="utf-8") as metadata_file:
+                metadata = json.load(metadata_file)
+            results = np.load(checkpoint.results_path)
+        except (OSError, ValueError):
+            return None
+        if metadata["stage"] != stage or len(results) != metadata["count"]:
+            return None
+        # progress from before resuming is treated as its own worker
+        checkpoint.completed_chunks["resumed"] = [
+            tuple(chunk) for chunk in metadata["completed"]
+        ]
+        checkpoint.results["resumed"] = results
+        checkpoint.complete = metadata["complete"]
+        return checkpoint
+
+    def all_completed_chunks(self) -> list[tuple[int, int]]:
+        """Every chunk completed by any worker"""
+        with self.lock:
+            return [
+                chunk for chunks in self.completed_chunks.values() for chunk in chunks
+            ]
+
+    def all_results(self) -> np.ndarray:
+        """Every result found by any worker"""
+        with self.lock:
+            return np.concatenate(
+                [np.zeros(0, np.uint64), *self.results.values()]
+            ).astype(np.uint64)
+
+    def due(self) -> bool:
+        """Check if enough time has passed since the last save"""
+        return time.monotonic() - self.last_save >= CHECKPOINT_INTERVAL
+
+    def update(
+        self,
+        worker: str,
+        completed_chunks: list[tuple[int, int]],
+        results: np.ndarray,
+        save: bool = True,
+    ) -> None:
+        """Record a worker's progress and optionally save the checkpoint"""
+        with self.lock:
+            self.completed_chunks[worker] = list(completed_chunks)
+            self.results[worker] = results
+        if save:
+            self.save()
+
+    def finish(self, results: np.ndarray) -> None:
+        """Mark the search as complete with its final results and save the checkpoint"""
+        with self.lock:
+            self.completed_chunks = {"complete": []}
+            self.results = {"complete": results}
+            self.complete = True
+        self.save()
+
+    def save(self) -> None:
+        """Write the checkpoint to disk"""
+        completed_chunks = self.all_completed_chunks()
+        results = self.all_results()
+        with self.lock:
+            metadata = {
+                "stage": self.stage,
+                "completed": completed_chunks,
+                "count": len(results),
+                "complete": self.complete,
+            }
+            try:
+                os.makedirs(CHECKPOINT_DIRECTORY, exist_ok=True)
+                # write results first so that metadata never refers to missing results
+                temp_path = f"{self.results_path}.tmp.npy"
+                np.save(temp_path, results)
+                os.replace(temp_path, self.results_path)
+                temp_path = f"{self.metadata_path}.tmp"
+                with open(temp_path, "w", encoding="utf-8") as metadata_file:
+                    json.dump(metadata, metadata_file)
+                os.replace(temp_path, self.metadata_path)
+                remove_expired()
+            except OSError:
+                # checkpointing is best effort and should not fail the search
+                pass
+            self.last_save = time.monotonic()
+
+    def remove(self) -> None:
+        """Delete the checkpoint from disk"""
+        for path in (self.metadata_path, self.results_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def start_checkpoint(stage: str, key: str, resume: bool) -> Checkpoint:
+    """Load the checkpoint of a search when resuming, otherwise start a new one"""
+    checkpoint = Checkpoint.load(stage, key) if resume else None
+    return checkpoint or Checkpoint(stage, key)
@@ -0,0 +1,261 @@
+"""Shared OpenCL context, command queue and buffer management"""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Callable
+
+import numpy as np
+import pyopencl as cl
+from platformdirs import user_config_dir
+
+from .program_cache import build_program
+
+SETTINGS_PATH = os.path.join(user_config_dir("pla-reverse-gui", False), "opencl.json")
+
+
+_DEVICES: list[tuple[int, int, cl.Device]] = None
+_DEVICES_LOCK = threading.Lock()
+
+
+def enumerate_devices() -> list[tuple[int, int, cl.Device]]:
+    """Enumerate every OpenCL device as (platform index, device index, device)"""
+    devices = []
+    try:
+        platforms = cl.get_platforms()
+    except cl.Error:
+        # no ICD loader or no installed platforms
+        return devices
+    for platform_index, platform in enumerate(platforms):
+        try:
+            platform_devices = platform.get_devices()
+        except cl.Error:
+            continue
+        for device_index, device in enumerate(platform_devices):
+            devices.append((platform_index, device_index, device))
+    return devices
+
+
+def list_devices() -> list[tuple[int, int, cl.Device]]:
+    """List every available OpenCL device, only enumerated once per session"""
+    global _DEVICES  # pylint: disable=global-statement
+    with _DEVICES_LOCK:
+        if _DEVICES is None:
+            _DEVICES = enumerate_devices()
+        return _DEVICES
+
+
+def device_label(device: cl.Device) -> str:
+    """Human readable label for a device"""
+    return f"{device.name.strip()} ({device.platform.name.strip()})"
+
+
+def load_device_selection() -> tuple[int, int]:
+    """Load the selected (platform index, device index), None if not selected"""
+    try:
+        with open(SETTINGS_PATH, "r", encoding="utf-8") as settings_file:
+            settings = json.load(settings_file)
+        return settings["platform"], settings["device"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_device_selection(platform_index: int, device_index: int) -> None:
+    """Save the selected (platform index, device index)"""
+    os.makedirs(os.path.dirname(SETTINGS_PATH), exist_ok=True)
+    with open(SETTINGS_PATH, "w", encoding="utf-8") as settings_file:
+        json.dump({"platform": platform_index, "device": device_index}, settings_file)
+
+
+class ComputeContext:
+    """Long-lived OpenCL context for one device shared by every compute thread"""
+
+    # fraction of device memory that idle pooled buffers may hold on to
+    MAX_IDLE_MEMORY = 0.25
+
+    def __init__(self, device: cl.Device) -> None:
+        self.device = device
+        self.context = cl.Context([device])
+        self.lock = threading.Lock()
+        # builds take seconds, so they must not hold up queues and buffers
+        self.program_lock = threading.Lock()
+        self.idle_queues: list[tuple[bool, cl.CommandQueue]] = []
+        # oldest first
+        self.idle_buffers: list[tuple[int, cl.Buffer]] = []
+        self.max_idle_bytes = int(device.global_mem_size * self.MAX_IDLE_MEMORY)
+        self.programs: dict[tuple[str, tuple[str]], cl.Program] = {}
+        # device memory is host memory (cpu devices, integrated gpus),
+        # so inputs can be used in place and results read by mapping their buffer
+        try:
+            self.unified_memory = bool(device.host_unified_memory)
+        except (cl.Error, AttributeError):
+            self.unified_memory = bool(device.type & cl.device_type.CPU)
+
+    def get_program(
+        self,
+        source: str,
+        options: tuple[str] = (),
+        log: Callable[[str], None] = None,
+    ) -> cl.Program:
+        """Get a built program, building it at most once per session"""
+        key = (source, tuple(options))
+        with self.program_lock:
+            program = self.programs.get(key)
+            if program is None:
+                program = build_program(self.context, source, options, log)
+                self.programs[key] = program
+            elif log is not None:
+                log("Reusing program built this session.")
+        return program
+
+    def acquire_queue(self, profiling: bool = False) -> cl.CommandQueue:
+        """Take an idle command queue from the pool or create a new one"""
+        with self.lock:
+            for i, (queue_profiling, _) in enumerate(self.idle_queues):
+                if queue_profiling == profiling:
+                    return self.idle_queues.pop(i)[1]
+        return cl.CommandQueue(
+            self.context,
+            properties=(
+                cl.command_queue_properties.PROFILING_ENABLE if profiling else 0
+            ),
+        )
+
+    def release_queue(self, queue: cl.CommandQueue) -> None:
+        """Return a command queue to the pool once all of its work is done"""
+        queue.finish()
+        profiling = bool(
+            queue.properties & cl.command_queue_properties.PROFILING_ENABLE
+        )
+        with self.lock:
+            self.idle_queues.append((profiling, queue))
+
+    @contextmanager
+    def queue(self, profiling: bool = False):
+        """Context manager for a pooled command queue, optionally with event profiling"""
+        queue = self.acquire_queue(profiling)
+        try:
+            yield queue
+        finally:
+            self.release_queue(queue)
+
+    def acquire_buffer(
+        self, size: int, flags: int = cl.mem_flags.READ_WRITE
+    ) -> cl.Buffer:
+        """Take the smallest idle buffer of at least size bytes or allocate a new one"""
+        size = max(size, 1)
+        with self.lock:
+            candidates = [
+                (buffer.size, i)
+                for i, (buffer_flags, buffer) in enumerate(self.idle_buffers)
+                if buffer_flags == flags and buffer.size >= size
+            ]
+            if candidates:
+                _, index = min(candidates)
+                return self.idle_buffers.pop(index)[1]
+        return cl.Buffer(self.context, flags, size)
+
+    def release_buffer(self, buffer: cl.Buffer) -> None:
+        """Return a buffer to the pool to be reused by later stages"""
+        if buffer.flags & cl.mem_flags.USE_HOST_PTR:
+            # wraps a host array, freed along with it rather than pooled
+            return
+        with self.lock:
+            self.idle_buffers.append((buffer.flags, buffer))
+            evicted = self.trim_buffers(self.max_idle_bytes)
+        for idle_buffer in evicted:
+            idle_buffer.release()
+
+    def trim_buffers(self, max_bytes: int) -> list[cl.Buffer]:
+        """
+        Remove the oldest idle buffers until the pool holds at most max_bytes
+        Returns the removed buffers to be released, called with the lock held
+        """
+        idle_bytes = sum(buffer.size for _, buffer in self.idle_buffers)
+        evicted = []
+        while self.idle_buffers and idle_bytes > max_bytes:
+            _, buffer = self.idle_buffers.pop(0)
+            idle_bytes -= buffer.size
+            evicted.append(buffer)
+        return evicted
+
+    def upload(
+        self, queue: cl.CommandQueue, host_array, flags: int = cl.mem_flags.READ_ONLY
+    ) -> cl.Buffer:
+        """
+        Acquire a pooled buffer and copy host_array into it
+        With unified memory the buffer wraps host_array in place instead
+        """
+        if self.unified_memory and host_array.nbytes:
+            return cl.Buffer(
+                self.context,
+                flags | cl.mem_flags.USE_HOST_PTR,
+                hostbuf=np.ascontiguousarray(host_array),
+            )
+        buffer = self.acquire_buffer(host_array.nbytes, flags)
+        cl.enqueue_copy(queue, buffer, host_array)
+        return buffer
+
+
+_COMPUTE_CONTEXTS: dict[tuple[int, int], ComputeContext] = {}
+_COMPUTE_CONTEXT_LOCK = threading.Lock()
+
+
+def _get_compute_context(
+    platform_index: int, device_index: int, device: cl.Device
+) -> ComputeContext:
+    """Get the compute context of a device, creating it on first use"""
+    key = (platform_index, device_index)
+    if key not in _COMPUTE_CONTEXTS:
+        _COMPUTE_CONTEXTS[key] = ComputeContext(device)
+    return _COMPUTE_CONTEXTS[key]
+
+
+def select_device(platform_index: int, device_index: int) -> None:
+    """Select and save the device used for all compute threads"""
+    save_device_selection(platform_index, device_index)
+
+
+def selected_device() -> tuple[int, int, cl.Device]:
+    """The selected (platform index, device index, device), or the default device"""
+    devices = list_devices()
+    if not devices:
+        raise RuntimeError("No OpenCL devices available")
+    selection = load_device_selection()
+    return next(
+        (item for item in devices if (item[0], item[1]) == selection),
+        # default to the first gpu if there is one
+        next(
+            (item for item in devices if item[2].type & cl.device_type.GPU),
+            devices[0],
+        ),
+    )
+
+
+def get_compute_context() -> ComputeContext:
+    """Get the shared compute context of the selected device, creating it on first use"""
+    platform_index, device_index, device = selected_device()
+    with _COMPUTE_CONTEXT_LOCK:
+        return _get_compute_context(platform_index, device_index, device)
+
+
+def get_all_compute_contexts() -> list[ComputeContext]:
+    """Get the shared compute contexts of every available device"""
+    devices = list_devices()
+    if not devices:
+        raise RuntimeError("No OpenCL devices available")
+    with _COMPUTE_CONTEXT_LOCK:
+        return [
+            _get_compute_context(platform_index, device_index, device)
+            for platform_index, device_index, device in devices
+        ]
+
+
+def select_backend() -> str:
+    """Pick the OpenCL backend if the selected device is usable, otherwise the CPU backend"""
+    try:
+        get_compute_context()
+    except (cl.Error, RuntimeError):
+        return "cpu"
+    return "opencl"
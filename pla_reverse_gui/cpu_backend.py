@@ -0,0 +1,76 @@
+"""Numba CPU implementation of the fixed seed search for machines without OpenCL"""
+
+import numba
+import numpy as np
+from numba_pokemon_prngs.xorshift import Xoroshiro128PlusRejection
+from numba_progress.numba_atomic import atomic_add
+
+from .verification import PARAM_MAX_IVS, PARAM_MIN_IVS, VALID, fixed_seed_status
+
+
+@numba.njit(nogil=True)
+def combination_ivs(combination: int, params: np.ndarray) -> np.ndarray:
+    """IVs of the combination-th combination of ivs within the ranges of params"""
+    ivs = np.empty(6, np.uint32)
+    for i in range(6):
+        range_size = params[PARAM_MAX_IVS + i] - params[PARAM_MIN_IVS + i] + 1
+        ivs[i] = params[PARAM_MIN_IVS + i] + combination % range_size
+        combination //= range_size
+    return ivs
+
+
+@numba.njit(nogil=True)
+def iv_target(guesses: tuple[int, int, int], ivs: np.ndarray) -> np.uint64:
+    """
+    Build the 60 bit target vector from guesses of the low 5 bits of s0 for every iv rand
+    target bits [10 * i, 10 * i + 5) are s0's and [10 * i + 5, 10 * i + 10) are s1's for iv i
+    """
+    target = np.uint64(0)
+    for i in range(6):
+        s0_bits = (guesses[i >> 1] >> (5 * (i & 1))) & 31
+        s1_bits = (ivs[i] - s0_bits) & 31
+        target |= np.uint64(s0_bits | (s1_bits << 5)) << np.uint64(10 * i)
+    return target
+
+
+@numba.njit(parallel=True, nogil=True)
+def find_fixed_seeds(
+    count: np.ndarray,
+    results: np.ndarray,
+    seed_mat: np.ndarray,
+    null_space: np.ndarray,
+    iv_const: np.uint64,
+    params: np.ndarray,
+    sizes: np.ndarray,
+    offset: int,
+    x_size: int,
+) -> None:
+    """
+    Search x_size slices of the fixed seed space starting at offset
+    slices [1024 * c, 1024 * (c + 1)) search the c-th combination of ivs within the ranges
+    count[0]: uint64 number of fixed seeds found, may exceed len(results)
+    """
+    total_dim = 32**2
+    combinations = 1 << len(null_space)
+    for x in numba.prange(x_size):
+        # faster to reinit rather than create new objects
+        rng = Xoroshiro128PlusRejection(0, 0)
+        slice_index = offset + x
+        ivs = combination_ivs(slice_index // total_dim, params)
+        for y in range(total_dim):
+            for z in range(total_dim):
+                target = iv_target((slice_index % total_dim, y, z), ivs) ^ iv_const
+                seed = np.uint64(0)
+                for bit in range(len(seed_mat)):
+                    if (target >> np.uint64(bit)) & np.uint64(1):
+                        seed ^= seed_mat[bit]
+                # every seed in the coset of the nullspace gives the same iv bits
+                for combination in range(combinations):
+                    candidate = seed
+                    for bit in range(len(null_space)):
+                        if (combination >> bit) & 1:
+                            candidate ^= null_space[bit]
+                    if fixed_seed_status(rng, candidate, params, sizes) == VALID:
+                        index = atomic_add(count, 0, np.uint64(1))
+                        if index < len(results):
+                            results[index] = candidate
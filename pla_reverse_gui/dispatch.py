@@ -0,0 +1,93 @@
+"""Scheduling of kernel work across devices"""
+
+import threading
+from collections import deque
+from typing import Callable
+
+import pyopencl as cl
+
+# launches kept enqueued per queue so the device never waits on the host
+IN_FLIGHT_LAUNCHES = 2
+
+
+class ChunkScheduler:
+    """Thread-safe pool of work that every device takes chunks from until it is empty"""
+
+    def __init__(
+        self,
+        start: int,
+        total: int,
+        chunk_size: int,
+        workers: int = 1,
+        completed_chunks: list[tuple[int, int]] = (),
+    ) -> None:
+        self.total = total
+        self.chunk_size = max(chunk_size, 1)
+        self.workers = max(workers, 1)
+        # (start, end) ranges of work that have not been taken yet
+        self.pending: deque[tuple[int, int]] = deque()
+        position = start
+        for offset, size in sorted(completed_chunks):
+            if offset > position:
+                self.pending.append((position, offset))
+            position = max(position, offset + size)
+        if position < total:
+            self.pending.append((position, total))
+        self.remaining = sum(end - begin for begin, end in self.pending)
+        self.completed = total - self.remaining
+        self.lock = threading.Lock()
+
+    def next_chunk(self, chunk_size: int = None) -> tuple[int, int]:
+        """
+        Take the next (offset, size) chunk, None once all work is taken
+        chunk_size overrides the default chunk size, e.g. for a tuned device
+        """
+        with self.lock:
+            if not self.pending:
+                return None
+            begin, end = self.pending[0]
+            size = min(max(chunk_size or self.chunk_size, 1), end - begin)
+            if self.workers > 1:
+                # shrink chunks towards the end so that uneven devices finish together
+                size = min(size, max(self.remaining // (2 * self.workers), 1))
+            if begin + size == end:
+                self.pending.popleft()
+            else:
+                self.pending[0] = (begin + size, end)
+            self.remaining -= size
+            return begin, size
+
+    def complete(self, size: int) -> int:
+        """Mark size units of work as done and return the total completed"""
+        with self.lock:
+            self.completed += size
+            return self.completed
+
+
+class EventDispatcher:
+    """Keeps up to depth launches in flight, completing them in submission order"""
+
+    def __init__(self, depth: int = IN_FLIGHT_LAUNCHES) -> None:
+        self.depth = max(depth, 1)
+        self.in_flight: deque[tuple[cl.Event, Callable[[], None]]] = deque()
+
+    def reserve(self) -> None:
+        """Complete the oldest launches until another one can be submitted"""
+        while len(self.in_flight) >= self.depth:
+            self.complete_oldest()
+
+    def submit(self, event: cl.Event, on_complete: Callable[[], None]) -> None:
+        """Track a launch, on_complete is called once its event has completed"""
+        self.reserve()
+        self.in_flight.append((event, on_complete))
+
+    def complete_oldest(self) -> None:
+        """Wait for the oldest launch and run its completion callback"""
+        event, on_complete = self.in_flight.popleft()
+        event.wait()
+        on_complete()
+
+    def finish(self) -> None:
+        """Complete every launch still in flight"""
+        while self.in_flight:
+            self.complete_oldest()
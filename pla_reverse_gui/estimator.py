@@ -0,0 +1,146 @@
+"""Pre-flight estimates of the size and runtime of a seed finder run"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+from .pla_reverse_main import pla_reverse
+from .autotune import load_profile
+from .matrix_table import fixed_seed_matrices
+from .size_index import bitset_sizes
+
+# work items/s assumed for devices that have not completed a search yet,
+# roughly a mid-range discrete gpu
+DEFAULT_THROUGHPUT = 2e9
+# work items of the generator seed search per fixed seed
+GENERATOR_WORK_PER_SEED = 256 ** 3
+# result buffers are sized for 1.5x the expected results and double buffered
+RESULT_BYTES_PER_SEED = 8 * 1.5 * 2
+
+
+class PokemonEstimate(NamedTuple):
+    """Observed values that determine the fixed seed search of a pokemon"""
+
+    shiny_rolls: int
+    iv_combinations: int
+    two_abilities: bool
+    # bitmasks of every allowed value
+    abilities: int
+    genders: int
+    natures: int
+    gender_ratio: int
+    sizes: np.ndarray
+
+
+class RunEstimate(NamedTuple):
+    """Expected results, device memory and wall time of a run"""
+
+    fixed_seeds: tuple[float, ...]
+    generator_seeds: float
+    memory: int
+    seconds: float
+    # whether the throughput of the device has been measured
+    calibrated: bool
+
+
+def throughput(stage: str, device_name: str) -> tuple[float, bool]:
+    """Measured (work items/s, True) of a stage on a device or (default, False)"""
+    measured = load_profile().get(f"{stage}:{device_name}")
+    if measured:
+        return measured, True
+    return DEFAULT_THROUGHPUT, False
+
+
+def expected_fixed_seeds(
+    iv_combinations: int,
+    two_abilities: bool,
+    abilities: int,
+    genders: int,
+    natures: int,
+    gender_ratio: int,
+    sizes_set: set,
+) -> float:
+    """
+    Expected fixed seeds of a search, summed over every allowed combination of values
+    calc_expected_seeds counts a single ability, gender and nature
+    """
+    if 1 <= gender_ratio <= 253:
+        allowed_genders = [gender for gender in (0, 1) if (genders >> gender) & 1]
+    else:
+        # gender is not rolled, so the value passed does not matter
+        allowed_genders = [0]
+    allowed_abilities = bin(abilities).count("1") if two_abilities else 1
+    return (
+        iv_combinations
+        * allowed_abilities
+        * bin(natures).count("1")
+        * sum(
+            pla_reverse.odds.calc_expected_seeds(
+                two_abilities, gender, gender_ratio, sizes_set
+            )
+            for gender in allowed_genders
+        )
+    )
+
+
+def fixed_seed_work(shiny_rolls: int, iv_combinations: int) -> int:
+    """Work items of the fixed seed search, 2^30 targets per nullspace coset and ivs"""
+    _, null_space, _ = fixed_seed_matrices(shiny_rolls)
+    return (32 ** 2) ** 3 * (1 << len(null_space)) * iv_combinations
+
+
+def estimate_run(
+    pokemon: list[PokemonEstimate], orders: int, device_name: str
+) -> RunEstimate:
+    """Estimate a run that searches the fixed seeds of every pokemon then orders"""
+    fixed_seeds = tuple(
+        expected_fixed_seeds(
+            pokemon_.iv_combinations,
+            pokemon_.two_abilities,
+            pokemon_.abilities,
+            pokemon_.genders,
+            pokemon_.natures,
+            pokemon_.gender_ratio,
+            bitset_sizes(pokemon_.sizes),
+        )
+        for pokemon_ in pokemon
+    )
+    # every order searches the generator seeds of its first pokemon's fixed seeds,
+    # which map to generator seeds about one to one
+    generator_seeds = sum(fixed_seeds[:orders])
+    fixed_throughput, fixed_calibrated = throughput("fixed_seeds", device_name)
+    generator_throughput, generator_calibrated = throughput(
+        "generator_seeds", device_name
+    )
+    # stages share the device, so their times add up even when they overlap
+    seconds = (
+        sum(
+            fixed_seed_work(pokemon_.shiny_rolls, pokemon_.iv_combinations)
+            for pokemon_ in pokemon
+        )
+        / fixed_throughput
+        + generator_seeds * GENERATOR_WORK_PER_SEED / generator_throughput
+    )
+    memory = round(
+        sum(fixed_seeds) * RESULT_BYTES_PER_SEED
+        # generator seed inputs and results
+        + generator_seeds * (8 + RESULT_BYTES_PER_SEED)
+    )
+    return RunEstimate(
+        fixed_seeds,
+        generator_seeds,
+        memory,
+        seconds,
+        fixed_calibrated and generator_calibrated,
+    )
+
+
+def format_duration(seconds: float) -> str:
+    """Human readable duration"""
+    minutes, seconds = divmod(round(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h {minutes:02}m"
+    if minutes:
+        return f"{minutes}m {seconds:02}s"
+    return f"{seconds}s"
@@ -1,9 +1,11 @@
 """Interface for pla_reverse's kernels"""
-import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 import numpy as np
 import pyopencl as cl
-from numba_pokemon_prngs.xorshift import Xoroshiro128PlusRejection
 
 # pylint: disable=no-name-in-module
 from qtpy.QtCore import QThread, Signal
@@ -11,10 +13,50 @@ from qtpy.QtCore import QThread, Signal
 # pylint: enable=no-name-in-module
 
 from .pla_reverse_main import pla_reverse
-from .util import get_personal_index, get_personal_info
+from . import cpu_backend, shaders
+from .compute_context import (
+    ComputeContext,
+    device_label,
+    get_all_compute_contexts,
+    get_compute_context,
+    select_backend,
+)
+from .autotune import ChunkTuner, save_throughput
+from .checkpoint import Checkpoint, checkpoint_key, start_checkpoint
+from .dispatch import IN_FLIGHT_LAUNCHES, ChunkScheduler, EventDispatcher
+from .estimator import expected_fixed_seeds
+from .matrix_table import fixed_seed_matrices
+from .profiling import DISABLED, StageProfiler
+from .result_cache import load_results, result_key, save_results
+from .result_store import DeviceResults, ResultStore
+from .size_index import bitset_sizes, possible_sizes_bitset
+from .util import get_gender_ratio, get_personal_info, iv_combinations
+from .verification import (
+    ANY_ABILITY,
+    ANY_GENDER,
+    ANY_NATURE,
+    STATUS_NAMES,
+    VALID,
+    value_mask,
+    verify_fixed_seeds,
+    verify_group_seeds,
+)
+
+# slice offsets are passed to the fixed seed kernel as uint
+MAX_IV_COMBINATIONS = (1 << 32) // 32 ** 2
+
+
+class ComputeMatricesThread(QThread):
+    """Compute fixed seed matrices missing from the packaged table"""
+
+    def __init__(self, shiny_rolls: set[int]) -> None:
+        super().__init__()
+        self.shiny_rolls = shiny_rolls
 
-# TODO: selection for ctx
-os.environ["PYOPENCL_CTX"] = ""
+    def run(self) -> None:
+        """Thread work"""
+        for shiny_rolls in self.shiny_rolls:
+            fixed_seed_matrices(shiny_rolls)
 
 
 class ComputeFixedSeedsThread(QThread):
@@ -26,9 +68,26 @@ class ComputeFixedSeedsThread(QThread):
     init_progress_bar = Signal(int)
     progress = Signal(int)
 
-    def __init__(self, *args) -> None:
+    def __init__(
+        self,
+        *args,
+        runtime_parameters: bool = True,
+        multi_device: bool = False,
+        backend: str = None,
+        resume: bool = False,
+        profiler: StageProfiler = None,
+    ) -> None:
         super().__init__()
         self.args = args
+        # pass pokemon data as kernel arguments rather than compiling it into the shader
+        self.runtime_parameters = runtime_parameters
+        # spread the search over every available device
+        self.multi_device = multi_device
+        # "opencl" or "cpu", None to pick automatically
+        self.backend = backend
+        # continue from the checkpoint of an interrupted search with the same inputs
+        self.resume = resume
+        self.profiler = profiler or DISABLED.stage("fixed seeds")
 
     def run(self):
         """Thread work"""
@@ -37,7 +96,8 @@ class ComputeFixedSeedsThread(QThread):
             species_form,
             basculin_gender,
             shiny_rolls,
-            ivs,
+            min_ivs,
+            max_ivs,
             ability,
             nature,
             gender,
@@ -47,50 +107,61 @@ class ComputeFixedSeedsThread(QThread):
             imperial,
         ) = self.args
         personal_info = get_personal_info(*species_form)
-        if basculin_gender is not None and species_form == (550, 2):
-            gender_ratio = (0, 254)[basculin_gender]
-        else:
-            gender_ratio = personal_info.gender_ratio
-        self.log.emit("Computing possible sizes....")
-        sizes_set = set(
-            pla_reverse.size.all_possible_sizes(
-                get_personal_index(*measured_species[0]),
-                heights[0],
-                weights[0],
-                imperial,
+        gender_ratio = get_gender_ratio(species_form, basculin_gender)
+        combinations = iv_combinations(min_ivs, max_ivs)
+        if not 1 <= combinations <= MAX_IV_COMBINATIONS:
+            self.log.emit(
+                f"{combinations} IV combinations, "
+                f"the IV ranges must allow between 1 and {MAX_IV_COMBINATIONS}."
             )
-        )
-        for measured_species_, height, weight in zip(
-            measured_species[1:], heights[1:], weights[1:]
-        ):
-            sizes_set &= set(
-                pla_reverse.size.all_possible_sizes(
-                    get_personal_index(*measured_species_), height, weight, imperial
+            return
+        if combinations > 1:
+            self.log.emit(f"Searching {combinations} IV combinations.")
+        if combinations > 1 or None in (ability, nature, gender):
+            if not self.runtime_parameters:
+                # the upstream shader is built for exact ivs and known values
+                self.log.emit(
+                    "IV ranges and unknown values require runtime parameters."
                 )
-            )
+                self.runtime_parameters = True
+        self.log.emit("Computing possible sizes....")
+        with self.profiler.span("setup", "possible sizes"):
+            sizes = possible_sizes_bitset(measured_species, heights, weights, imperial)
+        sizes_set = bitset_sizes(sizes)
         self.log.emit(f"{len(sizes_set)} possible sizes.")
+        cache_key = result_key(
+            species_form,
+            shiny_rolls,
+            min_ivs,
+            max_ivs,
+            ability,
+            nature,
+            gender,
+            gender_ratio,
+            sizes,
+        )
+        cached_results = load_results(cache_key)
+        if cached_results is not None:
+            self.log.emit(
+                f"{len(cached_results)} fixed seeds loaded from the result cache!"
+            )
+            self.results.emit(cached_results)
+            return
         self.log.emit("Setting kernel constants....")
+        with self.profiler.span("setup", "fixed seed matrices"):
+            seed_mat, null_space, iv_const = fixed_seed_matrices(shiny_rolls)
+        two_abilities = personal_info.ability_1 != personal_info.ability_2
+        # unknown values allow every possible value
+        abilities = value_mask(ability, ANY_ABILITY)
+        genders = value_mask(gender, ANY_GENDER)
+        natures = value_mask(nature, ANY_NATURE)
         kernel_constants = {
             "SHINY_ROLLS": shiny_rolls,
-            "IV_CONST": pla_reverse.matrix.vec_to_int(
-                pla_reverse.matrix.iv_const(shiny_rolls)
-            ),
-            "SEED_MAT": ",".join(
-                str(pla_reverse.matrix.vec_to_int(row))
-                for row in pla_reverse.matrix.generalized_inverse(
-                    pla_reverse.matrix.iv_matrix(shiny_rolls)
-                )
-            ),
-            "NULL_SPACE": ",".join(
-                str(pla_reverse.matrix.vec_to_int(row))
-                for row in pla_reverse.matrix.nullspace(
-                    pla_reverse.matrix.iv_matrix(shiny_rolls)
-                )
-            ),
-            "IVS": ",".join(str(iv) for iv in ivs),
-            "TWO_ABILITIES": str(
-                personal_info.ability_1 != personal_info.ability_2
-            ).lower(),
+            "IV_CONST": int(iv_const),
+            "SEED_MAT": ",".join(str(row) for row in seed_mat),
+            "NULL_SPACE": ",".join(str(row) for row in null_space),
+            "IVS": ",".join(str(iv) for iv in min_ivs),
+            "TWO_ABILITIES": str(two_abilities).lower(),
             "ABILITY": ability,
             "GENDER_RATIO": gender_ratio,
             "GENDER": gender,
@@ -99,105 +170,404 @@ class ComputeFixedSeedsThread(QThread):
                 str(size) for size in pla_reverse.size.build_sizes_table(sizes_set)
             ),
         }
+        params = np.array(
+            (
+                shiny_rolls,
+                two_abilities,
+                abilities,
+                gender_ratio,
+                genders,
+                natures,
+                *min_ivs,
+                *max_ivs,
+            ),
+            np.uint32,
+        )
         self.log.emit("Computing expected seeds....")
-        expected_seeds = pla_reverse.odds.calc_expected_seeds(
-            personal_info.ability_1 != personal_info.ability_2,
-            gender,
+        expected_seeds = expected_fixed_seeds(
+            combinations,
+            two_abilities,
+            abilities,
+            genders,
+            natures,
             gender_ratio,
             sizes_set,
         )
         self.log.emit(f"{expected_seeds} expected fixed seeds")
 
-        context = cl.create_some_context()
-        queue = cl.CommandQueue(context)
+        checkpoint = start_checkpoint(
+            "fixed_seeds", checkpoint_key("fixed_seeds", *self.args[1:]), self.resume
+        )
+        if checkpoint.complete:
+            self.log.emit("Using the results of a completed search.")
+            results = checkpoint.all_results()
+        else:
+            results = self.search(
+                checkpoint,
+                steps,
+                expected_seeds,
+                combinations,
+                kernel_constants,
+                (seed_mat, null_space, iv_const, params, sizes),
+            )
+            if self.isInterruptionRequested():
+                # progress so far is kept so that the search can be resumed
+                checkpoint.save()
+                self.log.emit("Fixed seed search cancelled.")
+                return
+            checkpoint.finish(results)
 
-        self.log.emit("Building kernel....")
-        program = cl.Program(
-            context,
-            pla_reverse.shaders.build_shader_code(
-                "fixed_seed_shader", kernel_constants
-            ),
-        ).build()
+        self.log.emit(f"{len(results)} fixed seeds found!")
+        self.init_progress_bar.emit(len(results))
+        self.log.emit("Verifying all fixed seeds....")
+        with self.profiler.span("verify", "verify fixed seeds"):
+            _, statuses = verify_fixed_seeds(results, params, sizes)
+        valid = statuses == VALID
+        self.progress.emit(len(results))
+        if not valid.all():
+            for status, count in zip(*np.unique(statuses[~valid], return_counts=True)):
+                self.log.emit(
+                    f"{STATUS_NAMES[status]} was wrong for {count} fixed seeds!"
+                )
+            first_invalid = results[np.argmin(valid)]
+            self.log.emit(f"First invalid fixed seed: {first_invalid:016X}")
+            return
 
-        host_results = np.zeros(round(expected_seeds * 1.5), np.uint64)
-        host_count = np.zeros(1, np.int32)
+        self.log.emit("All fixed seeds found were valid!")
+        save_results(cache_key, results)
+        self.results.emit(results)
 
-        device_results = cl.Buffer(
-            context,
-            cl.mem_flags.WRITE_ONLY | cl.mem_flags.COPY_HOST_PTR,
-            hostbuf=host_results,
-        )
-        device_count = cl.Buffer(
-            context,
-            cl.mem_flags.READ_WRITE | cl.mem_flags.COPY_HOST_PTR,
-            hostbuf=host_count,
-        )
+    def search(
+        self,
+        checkpoint: Checkpoint,
+        steps: int,
+        expected_seeds: int,
+        combinations: int,
+        kernel_constants: dict,
+        fixed_seed_inputs: tuple,
+    ) -> np.ndarray:
+        """Search every chunk of the fixed seed space not completed by checkpoint"""
+        backend = self.backend or select_backend()
+        if backend == "cpu":
+            self.log.emit("Using the CPU backend.")
+            if self.multi_device:
+                self.log.emit("Multiple devices are not supported by the CPU backend.")
+            source = None
+            kernel_inputs = fixed_seed_inputs
+            compute_contexts = [None]
+        elif self.runtime_parameters:
+            seed_mat, null_space, iv_const, params, sizes = fixed_seed_inputs
+            source = shaders.build_shader_code("fixed_seed_params_shader", {})
+            kernel_inputs = (
+                seed_mat,
+                np.uint32(len(seed_mat)),
+                null_space,
+                np.uint32(len(null_space)),
+                iv_const,
+                params,
+                sizes,
+            )
+        else:
+            source = pla_reverse.shaders.build_shader_code(
+                "fixed_seed_shader", kernel_constants
+            )
+            kernel_inputs = ()
+        if backend != "cpu":
+            compute_contexts = (
+                get_all_compute_contexts()
+                if self.multi_device
+                else [get_compute_context()]
+            )
 
+        # every combination of ivs is searched by its own 1024 slices
+        total_dim = 32 ** 2 * combinations
+        # every slice of the outer dimension checks 1024 * 1024 targets per nullspace coset
+        seeds_per_slice = (32 ** 2) ** 2 * (1 << len(fixed_seed_inputs[1]))
+        scheduler = ChunkScheduler(
+            0,
+            total_dim,
+            # auto tuning starts from a single slice unless the device was profiled
+            max(total_dim // steps, 1) if steps else 1,
+            len(compute_contexts),
+            checkpoint.all_completed_chunks(),
+        )
+        tuners = [
+            ChunkTuner(
+                "fixed_seeds:"
+                + ("CPU" if backend == "cpu" else device_label(context.device)),
+                seeds_per_slice,
+                scheduler.chunk_size,
+                total_dim,
+            )
+            if steps is None
+            else None
+            for context in compute_contexts
+        ]
+        if self.runtime_parameters or backend == "cpu":
+            # results are drained as they fill up, so the buffer only needs to fit a chunk
+            chunk_size = max(
+                tuner.chunk_size if tuner else scheduler.chunk_size for tuner in tuners
+            )
+            capacity = max(
+                round(expected_seeds * 1.5 * 2 * chunk_size / total_dim), 1024
+            )
+        else:
+            # the upstream shader does not bounds check its writes
+            capacity = round(expected_seeds * 1.5)
         self.log.emit("Processing....")
-        kernel = program.find_fixed_seeds_split
-        total_dim = 32 ** 2
         self.init_progress_bar.emit(total_dim)
-        step_size = total_dim // steps
-        i = 0
-        # TODO: is this the best way to split a 3d search?
-        for i in range(0, total_dim, step_size):
-            x_size = min(step_size, total_dim - i)
-            kernel(
-                queue,
-                (x_size, total_dim, total_dim),
-                None,
-                device_count,
-                device_results,
-                np.uint32(i),
-            ).wait()
-            self.progress.emit(i)
-
-        host_results = np.empty_like(host_results)
-        host_count = np.empty_like(host_count)
-
-        cl.enqueue_copy(queue, host_results, device_results)
-        cl.enqueue_copy(queue, host_count, device_count)
-
-        self.log.emit(f"{host_count[0]} fixed seeds found!")
-        results = host_results[: host_count[0]]
-
-        self.init_progress_bar.emit(host_count[0])
-        self.log.emit("Verifying all fixed seeds....")
-        for i, fixed_seed in enumerate(results):
-            rng = Xoroshiro128PlusRejection(fixed_seed)
-            rng.advance(2 + kernel_constants["SHINY_ROLLS"])
-            _ivs = tuple(rng.next_rand(32) for _ in range(6))
-            _ability = rng.next_rand(2)
-            if 1 <= kernel_constants["GENDER_RATIO"] <= 253:
-                gender_val = rng.next_rand(253)
-                _gender = (gender_val + 1) < kernel_constants["GENDER_RATIO"]
-            _nature = rng.next_rand(25)
-            _height = rng.next_rand(0x81) + rng.next_rand(0x80)
-            _weight = rng.next_rand(0x81) + rng.next_rand(0x80)
-            if _ivs != ivs:
-                self.log.emit(f"IVs were wrong! {_ivs} {ivs}")
-                return
-            if kernel_constants["TWO_ABILITIES"] == "true" and _ability != ability:
-                self.log.emit(f"Ability was wrong! {_ability} {ability}")
-                return
-            if 1 <= gender_ratio <= 253 and _gender != gender:
-                self.log.emit(f"Gender was wrong! {_gender} {gender}")
-                return
-            if _nature != nature:
-                self.log.emit(f"Nature was wrong! {_nature} {nature}")
-                return
-            if (
-                _height,
-                _weight,
-            ) not in sizes_set:
+        resumed_slices = scheduler.completed
+        if resumed_slices:
+            self.log.emit(
+                f"Resuming with {resumed_slices}/{total_dim} slices searched."
+            )
+            self.progress.emit(resumed_slices)
+        start_time = time.perf_counter()
+        if backend == "cpu":
+            self.search_cpu(scheduler, checkpoint, tuners[0], *kernel_inputs, capacity)
+        else:
+            with ThreadPoolExecutor(len(compute_contexts)) as executor:
+                list(
+                    executor.map(
+                        lambda worker: self.search_device(
+                            compute_contexts[worker],
+                            scheduler,
+                            checkpoint,
+                            str(worker),
+                            tuners[worker],
+                            source,
+                            kernel_inputs,
+                            capacity,
+                            seeds_per_slice,
+                        ),
+                        range(len(compute_contexts)),
+                    )
+                )
+        elapsed_time = time.perf_counter() - start_time
+        if elapsed_time > 0:
+            self.log.emit(
+                f"Searched at "
+                f"{(total_dim - resumed_slices) * seeds_per_slice / elapsed_time:,.0f} "
+                f"seeds/s ({backend})."
+            )
+        # merge the results found by every device and before resuming
+        return checkpoint.all_results()
+
+    def search_cpu(
+        self,
+        scheduler: ChunkScheduler,
+        checkpoint: Checkpoint,
+        tuner: ChunkTuner,
+        seed_mat: np.ndarray,
+        null_space: np.ndarray,
+        iv_const: np.uint64,
+        params: np.ndarray,
+        sizes: np.ndarray,
+        capacity: int,
+    ) -> None:
+        """Search chunks of the fixed seed space with the numba CPU backend"""
+        store = ResultStore(capacity)
+        completed_chunks = []
+        results = np.empty(capacity, np.uint64)
+        count = np.zeros(1, np.uint64)
+        start_time = time.perf_counter()
+        chunk = scheduler.next_chunk(tuner and tuner.chunk_size)
+        while chunk is not None and not self.isInterruptionRequested():
+            offset, x_size = chunk
+            if tuner:
+                tuner.start()
+            with self.profiler.span("kernel", "find_fixed_seeds (cpu)"):
+                cpu_backend.find_fixed_seeds(
+                    count,
+                    results,
+                    seed_mat,
+                    null_space,
+                    iv_const,
+                    params,
+                    sizes,
+                    offset,
+                    x_size,
+                )
+            if count[0] > len(results):
+                # results past the capacity were dropped, grow and re-run the chunk
                 self.log.emit(
-                    f"Height/Weight was wrong! {_height} {_weight} {sizes_set}"
+                    f"Result buffer overflowed ({count[0]} > {len(results)}), retrying."
                 )
-                return
-            self.progress.emit(i)
+                results = np.empty(2 * int(count[0]), np.uint64)
+                count[0] = 0
+                continue
+            store.extend(results[: count[0]])
+            count[0] = 0
+            completed_chunks.append(chunk)
+            self.progress.emit(scheduler.complete(x_size))
+            if tuner:
+                tuner.record(x_size)
+            if checkpoint.due():
+                checkpoint.update("cpu", completed_chunks, store.result().copy())
+            chunk = scheduler.next_chunk(tuner and tuner.chunk_size)
+        checkpoint.update("cpu", completed_chunks, store.result(), save=False)
+        elapsed_time = time.perf_counter() - start_time
+        searched_slices = sum(size for _, size in completed_chunks)
+        if tuner:
+            tuner.save()
+        elif searched_slices and elapsed_time > 0:
+            # calibrates the pre-flight estimates of later runs
+            seeds_per_slice = (32 ** 2) ** 2 * (1 << len(null_space))
+            save_throughput(
+                "fixed_seeds:CPU", searched_slices * seeds_per_slice / elapsed_time
+            )
 
-        self.log.emit("All fixed seeds found were valid!")
-        self.results.emit(results)
+    def search_device(
+        self,
+        compute_context: ComputeContext,
+        scheduler: ChunkScheduler,
+        checkpoint: Checkpoint,
+        worker: str,
+        tuner: ChunkTuner,
+        source: str,
+        kernel_inputs: tuple,
+        capacity: int,
+        seeds_per_slice: int,
+    ) -> None:
+        """Search chunks of the fixed seed space on one device until none are left"""
+        self.log.emit(f"Using {device_label(compute_context.device)}.")
+        self.log.emit("Building kernel....")
+        label = device_label(compute_context.device)
+        with self.profiler.span("build", f"build program ({label})"):
+            program = compute_context.get_program(source, log=self.log.emit)
+        # kernel objects hold their arguments so each device needs its own
+        kernel = cl.Kernel(program, "find_fixed_seeds_split")
+
+        profiling = self.profiler.enabled
+        with compute_context.queue(profiling) as queue, compute_context.queue(
+            profiling
+        ) as transfer_queue:
+            # results of one chunk are read back on the transfer queue
+            # while the next chunk runs on the compute queue
+            slots = [
+                DeviceResults(
+                    compute_context,
+                    transfer_queue,
+                    capacity,
+                    profiler=self.profiler,
+                    track=f"{label} transfer",
+                )
+                for _ in range(IN_FLIGHT_LAUNCHES)
+            ]
+            # arrays are uploaded to pooled buffers, scalars are passed as is
+            input_buffers = []
+            kernel_args = []
+            with self.profiler.span("transfer", f"upload inputs ({label})"):
+                for kernel_input in kernel_inputs:
+                    if isinstance(kernel_input, np.ndarray):
+                        input_buffers.append(
+                            compute_context.upload(queue, kernel_input)
+                        )
+                        kernel_args.append(input_buffers[-1])
+                    else:
+                        kernel_args.append(kernel_input)
+
+            searched_slices = 0
+            completed_chunks = []
+            dispatcher = EventDispatcher(len(slots))
+            retries = deque()
+
+            def on_complete(slot: DeviceResults, kernel_event: cl.Event, chunk):
+                nonlocal searched_slices
+                if not slot.check_chunk([kernel_event]):
+                    self.log.emit(
+                        f"Result buffer overflowed, retrying with {slot.capacity} slots."
+                    )
+                    retries.append(chunk)
+                    return
+                searched_slices += chunk[1]
+                completed_chunks.append(chunk)
+                self.progress.emit(scheduler.complete(chunk[1]))
+                if tuner:
+                    tuner.record(chunk[1])
+
+            start_time = time.perf_counter()
+            launch_index = 0
+            if tuner:
+                tuner.start()
+            # TODO: is this the best way to split a 3d search?
+            while True:
+                if self.isInterruptionRequested():
+                    # stop launching, launches in flight are still completed
+                    chunk = None
+                else:
+                    chunk = (
+                        retries.popleft()
+                        if retries
+                        else scheduler.next_chunk(tuner and tuner.chunk_size)
+                    )
+                if chunk is None:
+                    if not dispatcher.in_flight:
+                        break
+                    # completing a launch may queue a retry
+                    dispatcher.complete_oldest()
+                    continue
+                dispatcher.reserve()
+                # the last launch on this slot has completed after reserve
+                slot = slots[launch_index % len(slots)]
+                launch_index += 1
+                offset, x_size = chunk
+                kernel_event = kernel(
+                    queue,
+                    (x_size, 32 ** 2, 32 ** 2),
+                    None,
+                    slot.count_buffer,
+                    slot.results_buffer,
+                    # only the runtime parameterized shader bounds checks its writes
+                    *((np.uint32(slot.capacity),) if self.runtime_parameters else ()),
+                    *kernel_args,
+                    np.uint32(offset),
+                    wait_for=slot.wait_for,
+                )
+                self.profiler.event(
+                    "kernel", "find_fixed_seeds_split", f"{label} compute", kernel_event
+                )
+                queue.flush()
+                dispatcher.submit(
+                    kernel_event, partial(on_complete, slot, kernel_event, chunk)
+                )
+                if checkpoint.due():
+                    # wait for launches in flight so that results match completed chunks
+                    dispatcher.finish()
+                    checkpoint.update(
+                        worker,
+                        completed_chunks,
+                        np.concatenate([slot.collect() for slot in slots]),
+                    )
+            elapsed_time = time.perf_counter() - start_time
+
+            # merge the results of every slot
+            checkpoint.update(
+                worker,
+                completed_chunks,
+                np.concatenate([slot.finish() for slot in slots]),
+                save=False,
+            )
+            for buffer in input_buffers:
+                compute_context.release_buffer(buffer)
+
+        if tuner:
+            tuner.save()
+            self.log.emit(
+                f"{device_label(compute_context.device)}: "
+                f"tuned to {tuner.chunk_size} slices per launch."
+            )
+        if elapsed_time > 0:
+            self.log.emit(
+                f"{device_label(compute_context.device)}: "
+                f"{searched_slices * seeds_per_slice / elapsed_time:,.0f} seeds/s."
+            )
+            if not tuner and searched_slices:
+                # calibrates the pre-flight estimates of later runs
+                save_throughput(
+                    f"fixed_seeds:{label}",
+                    searched_slices * seeds_per_slice / elapsed_time,
+                )
 
 
 class ComputeGeneratorSeedsThread(QThread):
@@ -209,28 +579,76 @@ class ComputeGeneratorSeedsThread(QThread):
     init_progress_bar = Signal(int)
     progress = Signal(int)
 
-    def __init__(self, steps, fixed_seeds) -> None:
+    def __init__(
+        self,
+        steps,
+        fixed_seeds,
+        batch_size: int = None,
+        resume: bool = False,
+        profiler: StageProfiler = None,
+    ) -> None:
         super().__init__()
         self.steps = steps
         self.fixed_seeds = fixed_seeds
+        # fixed seeds searched per launch, None for one per launch or,
+        # when tuning, as many as the tuner puts in a chunk
+        self.batch_size = batch_size
+        # continue from the checkpoint of an interrupted search of the same fixed seeds
+        self.resume = resume
+        self.profiler = profiler or DISABLED.stage("generator seeds")
 
     def run(self):
         """Thread work"""
-        context = cl.create_some_context()
-        queue = cl.CommandQueue(context)
+        compute_context = get_compute_context()
+        label = device_label(compute_context.device)
+        self.log.emit(f"Using {label}.")
 
         total_seeds = len(self.fixed_seeds)
-        step_size = total_seeds // self.steps
+        # without steps the chunk size is tuned while searching
+        step_size = max(total_seeds // self.steps, 1) if self.steps else total_seeds
+        checkpoint = start_checkpoint(
+            "generator_seeds",
+            checkpoint_key("generator_seeds", self.fixed_seeds),
+            self.resume,
+        )
+        if checkpoint.complete:
+            self.log.emit("Using the results of a completed search.")
+            results = checkpoint.all_results()
+            self.log.emit((f"{len(results)} generator seeds found!"))
+            self.results.emit(results)
+            return
 
         self.log.emit("Building kernel....")
-        program = cl.Program(
-            context, pla_reverse.shaders.build_shader_code("generator_seed_shader", {})
-        ).build()
+        upstream_source = pla_reverse.shaders.build_shader_code(
+            "generator_seed_shader", {}
+        )
+        if "atom_inc" not in upstream_source:
+            self.log.emit("Warning: generator seed results are not bounds checked.")
+        # bounds checks the upstream shader's result writes
+        source = (
+            shaders.load_shader_source("generator_seed_bounds_shader")
+            + "\n"
+            + upstream_source
+        )
+        try:
+            with self.profiler.span("build", f"build program ({label})"):
+                program = compute_context.get_program(
+                    source
+                    + "\n"
+                    + shaders.load_shader_source("generator_seed_batch_shader"),
+                    log=self.log.emit,
+                )
+            kernel = cl.Kernel(program, "find_generator_seeds_batched")
+            batched = True
+        except cl.Error:
+            self.log.emit("Batched kernel unavailable, launching per fixed seed.")
+            with self.profiler.span("build", f"build program ({label})"):
+                program = compute_context.get_program(source, log=self.log.emit)
+            kernel = cl.Kernel(program, "find_generator_seeds")
+            batched = False
 
         self.log.emit("Initializing arrays....")
 
-        host_count = np.zeros(1, np.uint64)
-        host_results = np.zeros(round(total_seeds * 1.5), np.uint64)
         host_slices = np.zeros(256, np.uint64)
         host_seeds = self.fixed_seeds
         for i in range(256):
@@ -238,120 +656,286 @@ class ComputeGeneratorSeedsThread(QThread):
                 if (i >> k) & 1:
                     host_slices[i] |= np.uint64(1) << np.uint64(k * 8)
 
-        device_count = cl.Buffer(
-            context,
-            cl.mem_flags.READ_WRITE | cl.mem_flags.COPY_HOST_PTR,
-            hostbuf=host_count,
-        )
-        device_results = cl.Buffer(
-            context,
-            cl.mem_flags.WRITE_ONLY | cl.mem_flags.COPY_HOST_PTR,
-            hostbuf=host_results,
-        )
-        device_slices = cl.Buffer(
-            context,
-            cl.mem_flags.READ_ONLY | cl.mem_flags.COPY_HOST_PTR,
-            hostbuf=host_slices,
-        )
-        device_seeds = cl.Buffer(
-            context,
-            cl.mem_flags.READ_ONLY | cl.mem_flags.COPY_HOST_PTR,
-            hostbuf=host_seeds,
-        )
-
-        self.log.emit("Processing....")
-        kernel = program.find_generator_seeds
-        self.init_progress_bar.emit(total_seeds)
-        i = 0
-        while i < total_seeds:
-            for j in range(min(step_size, total_seeds - i)):
-                kernel(
-                    queue,
-                    (256, 256, 256),
-                    None,
-                    device_count,
-                    device_results,
-                    device_slices,
-                    device_seeds,
-                    np.uint32(i + j),
-                ).wait()
-            self.progress.emit(i + j)
-            i += step_size
-
-        host_count = np.empty_like(host_count)
-        host_results = np.empty_like(host_results)
-
-        cl.enqueue_copy(queue, host_results, device_results)
-        cl.enqueue_copy(queue, host_count, device_count)
-
-        results = host_results[: host_count[0]]
-        self.log.emit((f"{host_count[0]} generator seeds found!"))
+        profiling = self.profiler.enabled
+        with compute_context.queue(profiling) as queue, compute_context.queue(
+            profiling
+        ) as transfer_queue:
+            # results past the capacity are dropped and the chunk is re-run,
+            # so start with room for every result a chunk is expected to produce
+            slots = [
+                DeviceResults(
+                    compute_context,
+                    transfer_queue,
+                    round(total_seeds * 1.5),
+                    np.uint64,
+                    profiler=self.profiler,
+                    track=f"{label} transfer",
+                )
+                for _ in range(IN_FLIGHT_LAUNCHES)
+            ]
+            with self.profiler.span("transfer", f"upload inputs ({label})"):
+                device_slices = compute_context.upload(queue, host_slices)
+                device_seeds = compute_context.upload(queue, host_seeds)
+
+            self.log.emit("Processing....")
+            self.init_progress_bar.emit(total_seeds)
+            tuner = None
+            if not self.steps:
+                # start from one fixed seed unless the device was profiled,
+                # the measured launch times then grow the chunks
+                tuner = ChunkTuner(
+                    f"generator_seeds:{device_label(compute_context.device)}",
+                    256 ** 3,
+                    self.batch_size or 1,
+                    total_seeds,
+                )
+                step_size = tuner.chunk_size
+            if not batched:
+                batch_size = 1
+            elif self.batch_size or not tuner:
+                batch_size = self.batch_size or 1
+            else:
+                # a tuned chunk is a single launch, so the tuner sizes the launches
+                batch_size = None
+            if batch_size is None:
+                self.log.emit(
+                    f"Searching {step_size} fixed seeds per launch to start with."
+                )
+            else:
+                self.log.emit(f"Searching {batch_size} fixed seeds per launch.")
+            scheduler = ChunkScheduler(
+                0,
+                total_seeds,
+                step_size,
+                completed_chunks=checkpoint.all_completed_chunks(),
+            )
+            if scheduler.completed:
+                self.log.emit(
+                    f"Resuming with {scheduler.completed}/{total_seeds} fixed seeds "
+                    "searched."
+                )
+                self.progress.emit(scheduler.completed)
+            completed_chunks = []
+            dispatcher = EventDispatcher(len(slots))
+            retries = deque()
+
+            def on_complete(slot: DeviceResults, kernel_event: cl.Event, chunk):
+                if not slot.check_chunk([kernel_event]):
+                    self.log.emit(
+                        f"Result buffer overflowed, retrying with {slot.capacity} slots."
+                    )
+                    retries.append(chunk)
+                    return
+                completed_chunks.append(chunk)
+                self.progress.emit(scheduler.complete(chunk[1]))
+                if tuner:
+                    tuner.record(chunk[1])
+
+            launch_index = 0
+            cancelled = False
+            start_time = time.perf_counter()
+            if tuner:
+                tuner.start()
+            while True:
+                if self.isInterruptionRequested():
+                    # stop launching, launches in flight are still completed
+                    cancelled = True
+                    chunk = None
+                else:
+                    chunk = (
+                        retries.popleft()
+                        if retries
+                        else scheduler.next_chunk(tuner and tuner.chunk_size)
+                    )
+                if chunk is None:
+                    if not dispatcher.in_flight:
+                        break
+                    # completing a launch may queue a retry
+                    dispatcher.complete_oldest()
+                    continue
+                dispatcher.reserve()
+                # the last launch on this slot has completed after reserve
+                slot = slots[launch_index % len(slots)]
+                launch_index += 1
+                offset, size = chunk
+                kernel_event = None
+                for i in range(offset, offset + size, batch_size or size):
+                    kernel_event = kernel(
+                        queue,
+                        (256, 256, 256),
+                        None,
+                        slot.count_buffer,
+                        slot.results_buffer,
+                        device_slices,
+                        device_seeds,
+                        np.uint32(i),
+                        *(
+                            (np.uint32(min(batch_size or size, offset + size - i)),)
+                            if batched
+                            else ()
+                        ),
+                        wait_for=slot.wait_for if i == offset else None,
+                    )
+                    self.profiler.event(
+                        "kernel",
+                        "find_generator_seeds",
+                        f"{label} compute",
+                        kernel_event,
+                    )
+                queue.flush()
+                dispatcher.submit(
+                    kernel_event, partial(on_complete, slot, kernel_event, chunk)
+                )
+                if checkpoint.due():
+                    # wait for launches in flight so that results match completed chunks
+                    dispatcher.finish()
+                    checkpoint.update(
+                        "0",
+                        completed_chunks,
+                        np.concatenate([slot.collect() for slot in slots]),
+                    )
+
+            # merge the results of every slot and from before resuming
+            checkpoint.update(
+                "0",
+                completed_chunks,
+                np.concatenate([slot.finish() for slot in slots]),
+                # a cancelled search can be resumed later
+                save=cancelled,
+            )
+            results = checkpoint.all_results()
+            if not cancelled:
+                checkpoint.finish(results)
+            for buffer in (device_slices, device_seeds):
+                compute_context.release_buffer(buffer)
+
+        elapsed_time = time.perf_counter() - start_time
+        searched_seeds = sum(size for _, size in completed_chunks)
+        if tuner:
+            tuner.save()
+            self.log.emit(f"Tuned to {tuner.chunk_size} fixed seeds per launch.")
+        elif searched_seeds and elapsed_time > 0:
+            # calibrates the pre-flight estimates of later runs
+            save_throughput(
+                f"generator_seeds:{label}", searched_seeds * 256 ** 3 / elapsed_time
+            )
+        if cancelled:
+            self.log.emit("Generator seed search cancelled.")
+            return
+        self.log.emit((f"{len(results)} generator seeds found!"))
         self.results.emit(results)
 
 
 class ComputeGroupSeedThread(QThread):
-    """Interface for group_seed shader"""
+    """Interface for group_seed_candidates shader"""
+
+    # initial room for candidates, grown and re-run if a search finds more
+    INITIAL_CANDIDATES = 1024
 
     finished = Signal()
     valid_result = Signal(bool)
+    results = Signal(object)
     log = Signal(str)
 
-    def __init__(self, fixed_seeds_2, generator_seeds, multi_spawner: bool) -> None:
+    def __init__(
+        self,
+        fixed_seeds_1,
+        fixed_seeds_2,
+        generator_seeds,
+        multi_spawner: bool,
+        profiler: StageProfiler = None,
+    ) -> None:
         super().__init__()
+        self.fixed_seeds_1 = fixed_seeds_1
         self.fixed_seeds_2 = fixed_seeds_2
         self.generator_seeds = generator_seeds
         self.multi_spawner = multi_spawner
+        self.profiler = profiler or DISABLED.stage("group seed")
 
     def run(self) -> None:
         """Thread work"""
-        context = cl.create_some_context()
-        queue = cl.CommandQueue(context)
+        if len(self.generator_seeds) == 0:
+            self.log.emit("No generator seeds to search.")
+            self.results.emit(np.zeros(0, np.uint64))
+            self.valid_result.emit(False)
+            self.finished.emit()
+            return
+        compute_context = get_compute_context()
+        label = device_label(compute_context.device)
         self.log.emit("Building kernel....")
-        program = cl.Program(
-            context,
-            pla_reverse.shaders.build_shader_code(
-                "group_seed_shader", {"IS_MULTISPAWNER": int(self.multi_spawner)}
-            ),
-        ).build()
-        host_results = np.zeros(1, np.uint64)
+        with self.profiler.span("build", f"build program ({label})"):
+            program = compute_context.get_program(
+                shaders.build_shader_code("group_seed_candidates_shader", {}),
+                log=self.log.emit,
+            )
+        kernel = cl.Kernel(program, "find_group_seeds")
 
         host_generator_seeds = self.generator_seeds
         host_fixed_seeds = np.sort(self.fixed_seeds_2)
 
-        device_results = cl.Buffer(
-            context,
-            cl.mem_flags.WRITE_ONLY | cl.mem_flags.COPY_HOST_PTR,
-            hostbuf=host_results,
-        )
-        device_generator_seeds = cl.Buffer(
-            context,
-            cl.mem_flags.READ_ONLY | cl.mem_flags.COPY_HOST_PTR,
-            hostbuf=host_generator_seeds,
-        )
-        device_fixed_seeds = cl.Buffer(
-            context,
-            cl.mem_flags.READ_ONLY | cl.mem_flags.COPY_HOST_PTR,
-            hostbuf=host_fixed_seeds,
-        )
-        self.log.emit("Processing....")
-
-        kernel = program.find_group_seed
-        kernel(
-            queue,
-            (len(host_generator_seeds),),
-            None,
-            device_results,
-            device_generator_seeds,
-            device_fixed_seeds,
-            np.int32(len(host_fixed_seeds)),
-        )
-
-        host_results = np.empty_like(host_results)
-
-        cl.enqueue_copy(queue, host_results, device_results)
+        with compute_context.queue(self.profiler.enabled) as queue:
+            device_results = DeviceResults(
+                compute_context,
+                queue,
+                self.INITIAL_CANDIDATES,
+                profiler=self.profiler,
+                track=label,
+            )
+            with self.profiler.span("transfer", f"upload inputs ({label})"):
+                device_generator_seeds = compute_context.upload(
+                    queue, host_generator_seeds
+                )
+                device_fixed_seeds = compute_context.upload(queue, host_fixed_seeds)
+            self.log.emit("Processing....")
 
-        group_seed = host_results[0]
-        self.log.emit(f"Group Seed Found: {group_seed:016X} | {group_seed}")
-        # TODO: technically 1/2^64 valid group seed, use a better flag
-        self.valid_result.emit(group_seed != 0)
+            while True:
+                kernel_event = kernel(
+                    queue,
+                    (len(host_generator_seeds),),
+                    None,
+                    device_results.count_buffer,
+                    device_results.results_buffer,
+                    np.uint32(device_results.capacity),
+                    device_generator_seeds,
+                    device_fixed_seeds,
+                    np.uint32(len(host_fixed_seeds)),
+                    np.uint32(self.multi_spawner),
+                    wait_for=device_results.wait_for,
+                )
+                self.profiler.event("kernel", "find_group_seeds", label, kernel_event)
+                if device_results.check_chunk([kernel_event]):
+                    break
+                # far more candidates than expected, the fixed seed searches were loose
+                self.log.emit(
+                    "Candidate buffer overflowed, retrying with "
+                    f"{device_results.capacity} slots."
+                )
+            candidates = device_results.finish()
+            for buffer in (device_generator_seeds, device_fixed_seeds):
+                compute_context.release_buffer(buffer)
+
+        if self.isInterruptionRequested():
+            self.log.emit("Group seed search cancelled.")
+            self.valid_result.emit(False)
+            self.finished.emit()
+            return
+        self.log.emit(f"{len(candidates)} group seed candidates found.")
+        # rule out false hits by regenerating both pokemon from every candidate
+        with self.profiler.span("verify", "verify group seeds"):
+            valid = verify_group_seeds(
+                candidates,
+                self.multi_spawner,
+                np.sort(self.fixed_seeds_1),
+                host_fixed_seeds,
+            )
+        group_seeds = np.unique(candidates[valid])
+        for group_seed in group_seeds:
+            self.log.emit(f"Group Seed Found: {group_seed:016X} | {group_seed}")
+        if len(candidates) > len(group_seeds):
+            self.log.emit(
+                f"{len(candidates) - np.count_nonzero(valid)} candidates did not "
+                "regenerate both pokemon."
+            )
+        self.results.emit(group_seeds)
+        self.valid_result.emit(len(group_seeds) > 0)
         self.finished.emit()
@@ -0,0 +1,230 @@
+"""
+Precomputed GF(2) matrices of the fixed seed search for every shiny roll count
+The packaged table is generated with python -m pla_reverse_gui.matrix_table
+"""
+
+import argparse
+import os
+import struct
+import sys
+import threading
+
+import numpy as np
+from platformdirs import user_cache_dir
+
+# shipped with the package, entries missing from it are computed and cached
+PACKAGED_TABLE_PATH = os.path.join(
+    os.path.dirname(__file__), "data", "matrix_table.bin"
+)
+TABLE_PATH = os.path.join(user_cache_dir("pla-reverse-gui", False), "matrix_table.bin")
+TABLE_MAGIC = b"PLAM"
+# bump whenever compute_matrices changes so that saved tables are recomputed
+TABLE_VERSION = 3
+TABLE_HEADER = "<4sII"
+TABLE_ENTRY = "<IIIQ"
+# base research/shiny charm rolls, plus the rolls added by mass outbreaks (12)
+# and massive mass outbreaks (25)
+SHINY_ROLL_COUNTS = tuple(
+    shiny_rolls + extra_shiny_rolls
+    for extra_shiny_rolls in (0, 12, 25)
+    for shiny_rolls in range(1, 8)
+)
+MASK_64 = (1 << 64) - 1
+XOROSHIRO_CONST = 0x82A2B175229D6A5B
+# target vectors hold 10 bits per iv
+TARGET_BITS = 60
+
+MatrixEntry = tuple[np.ndarray, np.ndarray, np.uint64]
+
+
+def rotl(value: int, shift: int) -> int:
+    """Rotate a 64 bit value left"""
+    return ((value << shift) | (value >> (64 - shift))) & MASK_64
+
+
+def iv_target(seed: int, shiny_rolls: int) -> int:
+    """
+    Target vector of a fixed seed as built by the fixed seed kernels
+    bits [10 * i, 10 * i + 5) are the low bits of s0 and [10 * i + 5, 10 * i + 10)
+    the low bits of s1 before the rand of iv i
+    """
+    s0, s1 = seed, XOROSHIRO_CONST
+    target = 0
+    # encryption constant, sidtid, pid rolls, then the six ivs
+    for i in range(-2 - shiny_rolls, 6):
+        if i >= 0:
+            target |= ((s0 & 31) | ((s1 & 31) << 5)) << (10 * i)
+        s1 ^= s0
+        s0 = rotl(s0, 24) ^ s1 ^ ((s1 << 16) & MASK_64)
+        s1 = rotl(s1, 37)
+    return target
+
+
+def compute_matrices(shiny_rolls: int) -> MatrixEntry:
+    """
+    Compute SEED_MAT, NULL_SPACE and IV_CONST for a shiny roll count
+    iv_target is affine over GF(2), iv_target(seed) = M * seed ^ IV_CONST,
+    SEED_MAT is a generalized inverse of M (row i is the seed of target bit i)
+    and NULL_SPACE is a basis of the seeds M maps to 0
+    """
+    iv_const = iv_target(0, shiny_rolls)
+    # gaussian elimination of the image of every seed bit, keeping each image
+    # reduced so that its pivot bit is set in no other image
+    basis: dict[int, tuple[int, int]] = {}
+    null_space = []
+    for bit in range(64):
+        image, preimage = iv_target(1 << bit, shiny_rolls) ^ iv_const, 1 << bit
+        for pivot, (basis_image, basis_preimage) in basis.items():
+            if (image >> pivot) & 1:
+                image ^= basis_image
+                preimage ^= basis_preimage
+        if image == 0:
+            null_space.append(preimage)
+            continue
+        pivot = image.bit_length() - 1
+        for other_pivot, (basis_image, basis_preimage) in basis.items():
+            if (basis_image >> pivot) & 1:
+                basis[other_pivot] = (basis_image ^ image, basis_preimage ^ preimage)
+        basis[pivot] = (image, preimage)
+    # target bits outside the image can not be reached, their rows are unused
+    seed_mat = [basis[bit][1] if bit in basis else 0 for bit in range(TARGET_BITS)]
+    return (
+        np.array(seed_mat, np.uint64),
+        np.array(null_space, np.uint64),
+        np.uint64(iv_const),
+    )
+
+
+def read_table(path: str) -> dict[int, MatrixEntry]:
+    """Read a table of (seed_mat, null_space, iv_const) keyed by shiny roll count"""
+    with open(path, "rb") as table_file:
+        data = table_file.read()
+    magic, version, count = struct.unpack_from(TABLE_HEADER, data)
+    if magic != TABLE_MAGIC or version != TABLE_VERSION:
+        raise ValueError("Unsupported matrix table")
+    offset = struct.calcsize(TABLE_HEADER)
+    table = {}
+    for _ in range(count):
+        shiny_rolls, seed_mat_size, null_space_size, iv_const = struct.unpack_from(
+            TABLE_ENTRY, data, offset
+        )
+        offset += struct.calcsize(TABLE_ENTRY)
+        rows = np.frombuffer(
+            data, "<u8", seed_mat_size + null_space_size, offset
+        ).astype(np.uint64)
+        offset += rows.nbytes
+        table[shiny_rolls] = (
+            rows[:seed_mat_size],
+            rows[seed_mat_size:],
+            np.uint64(iv_const),
+        )
+    return table
+
+
+def write_table(path: str, table: dict[int, MatrixEntry]) -> None:
+    """Write a table of (seed_mat, null_space, iv_const) keyed by shiny roll count"""
+    # write to a temporary file first so that a partially written table is never loaded
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "wb") as table_file:
+        table_file.write(
+            struct.pack(TABLE_HEADER, TABLE_MAGIC, TABLE_VERSION, len(table))
+        )
+        for shiny_rolls, (seed_mat, null_space, iv_const) in sorted(table.items()):
+            table_file.write(
+                struct.pack(
+                    TABLE_ENTRY,
+                    shiny_rolls,
+                    len(seed_mat),
+                    len(null_space),
+                    int(iv_const),
+                )
+            )
+            table_file.write(seed_mat.astype("<u8").tobytes())
+            table_file.write(null_space.astype("<u8").tobytes())
+    os.replace(temp_path, path)
+
+
+def build_table() -> dict[int, MatrixEntry]:
+    """Compute the matrices of every supported shiny roll count"""
+    return {
+        shiny_rolls: compute_matrices(shiny_rolls) for shiny_rolls in SHINY_ROLL_COUNTS
+    }
+
+
+def tables_equal(table: dict[int, MatrixEntry], other: dict[int, MatrixEntry]) -> bool:
+    """Whether two tables hold the same entries"""
+    return table.keys() == other.keys() and all(
+        np.array_equal(table[key][0], other[key][0])
+        and np.array_equal(table[key][1], other[key][1])
+        and table[key][2] == other[key][2]
+        for key in table
+    )
+
+
+def load_table() -> dict[int, MatrixEntry]:
+    """Load the packaged and cached tables, skipping any missing, stale or unreadable"""
+    table = {}
+    for path in (TABLE_PATH, PACKAGED_TABLE_PATH):
+        try:
+            table.update(read_table(path))
+        except (OSError, ValueError, struct.error):
+            pass
+    return table
+
+
+_TABLE = load_table()
+_TABLE_LOCK = threading.Lock()
+
+
+def cached_fixed_seed_matrices(shiny_rolls: int) -> MatrixEntry:
+    """Look up the matrices of a shiny roll count, None instead of computing them"""
+    with _TABLE_LOCK:
+        return _TABLE.get(shiny_rolls)
+
+
+def fixed_seed_matrices(shiny_rolls: int) -> MatrixEntry:
+    """Look up SEED_MAT, NULL_SPACE and IV_CONST for a shiny roll count"""
+    entry = cached_fixed_seed_matrices(shiny_rolls)
+    if entry is not None:
+        return entry
+    # missing from the packaged table, compute just this entry without holding
+    # the lock so that lookups of other entries are not blocked
+    entry = compute_matrices(shiny_rolls)
+    with _TABLE_LOCK:
+        entry = _TABLE.setdefault(shiny_rolls, entry)
+        table = dict(_TABLE)
+    try:
+        os.makedirs(os.path.dirname(TABLE_PATH), exist_ok=True)
+        write_table(TABLE_PATH, table)
+    except OSError:
+        # the table is only a cache, computing again next session is fine
+        pass
+    return entry
+
+
+def main() -> None:
+    """Write the packaged table, or check that it is up to date"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="exit with an error if the packaged table differs from a rebuilt one",
+    )
+    args = parser.parse_args()
+    table = build_table()
+    if args.check:
+        try:
+            packaged_table = read_table(PACKAGED_TABLE_PATH)
+        except (OSError, ValueError, struct.error) as error:
+            sys.exit(f"{PACKAGED_TABLE_PATH} is unreadable: {error}")
+        if not tables_equal(packaged_table, table):
+            sys.exit(f"{PACKAGED_TABLE_PATH} is out of date, regenerate it")
+        print(f"{PACKAGED_TABLE_PATH} is up to date")
+        return
+    os.makedirs(os.path.dirname(PACKAGED_TABLE_PATH), exist_ok=True)
+    write_table(PACKAGED_TABLE_PATH, table)
+    print(f"Wrote {len(table)} entries to {PACKAGED_TABLE_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Host and OpenCL event timings of a search with a Chrome trace export"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import pyopencl as cl
+from platformdirs import user_cache_dir
+
+TRACE_DIRECTORY = os.path.join(user_cache_dir("pla-reverse-gui", False), "traces")
+
+
+class Profiler:
+    """
+    Collects timings of every stage of a search
+    Host spans are timed with perf_counter, device spans are read from OpenCL events
+    which requires queues created with PROFILING_ENABLE
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        # (stage, category, name, thread name, start, end) in seconds
+        self.host_spans: list[tuple[str, str, str, str, float, float]] = []
+        # (stage, category, name, track, event)
+        self.device_events: list[tuple[str, str, str, str, cl.Event]] = []
+
+    def stage(self, stage: str) -> "StageProfiler":
+        """View of this profiler that records to a stage"""
+        return StageProfiler(self, stage)
+
+    def device_spans(self) -> list[tuple[str, str, str, str, int, int]]:
+        """(stage, category, name, track, start, end) in device nanoseconds of every event"""
+        with self.lock:
+            device_events = list(self.device_events)
+        spans = []
+        for stage, category, name, track, event in device_events:
+            try:
+                start, end = event.profile.start, event.profile.end
+            except cl.Error:
+                # event of a queue without profiling or one that never ran
+                continue
+            spans.append((stage, category, name, track, start, end))
+        return spans
+
+    def summary(self) -> list[str]:
+        """Total time and count per stage and category"""
+        totals: dict[tuple[str, str], list] = {}
+        with self.lock:
+            host_spans = list(self.host_spans)
+        for stage, category, _, _, start, end in host_spans:
+            total = totals.setdefault((stage, category), [0, 0.0])
+            total[0] += 1
+            total[1] += end - start
+        for stage, category, _, _, start, end in self.device_spans():
+            total = totals.setdefault((stage, category), [0, 0.0])
+            total[0] += 1
+            total[1] += (end - start) / 1e9
+        return [
+            f"{stage} {category}: {seconds:.3f}s ({count}x)"
+            for (stage, category), (count, seconds) in sorted(totals.items())
+        ]
+
+    def write_trace(self, path: str = None) -> str:
+        """Write a Chrome trace (chrome://tracing, Perfetto) and return its path"""
+        if path is None:
+            os.makedirs(TRACE_DIRECTORY, exist_ok=True)
+            path = os.path.join(
+                TRACE_DIRECTORY, time.strftime("trace-%Y%m%d-%H%M%S.json")
+            )
+        with self.lock:
+            host_spans = list(self.host_spans)
+        device_spans = self.device_spans()
+        trace_events = []
+        # host and device clocks differ, each is shown relative to its first timestamp
+        host_origin = min((span[4] for span in host_spans), default=0)
+        for stage, category, name, thread_name, start, end in host_spans:
+            trace_events.append(
+                {
+                    "name": name,
+                    "cat": f"{stage}/{category}",
+                    "ph": "X",
+                    "ts": (start - host_origin) * 1e6,
+                    "dur": (end - start) * 1e6,
+                    "pid": "host",
+                    "tid": thread_name,
+                }
+            )
+        device_origin = min((span[4] for span in device_spans), default=0)
+        for stage, category, name, track, start, end in device_spans:
+            trace_events.append(
+                {
+                    "name": name,
+                    "cat": f"{stage}/{category}",
+                    "ph": "X",
+                    "ts": (start - device_origin) / 1e3,
+                    "dur": (end - start) / 1e3,
+                    "pid": "device",
+                    "tid": track,
+                }
+            )
+        with open(path, "w", encoding="utf-8") as trace_file:
+            json.dump({"traceEvents": trace_events}, trace_file)
+        return path
+
+
+class StageProfiler:
+    """Records timings of one stage to a Profiler"""
+
+    def __init__(self, profiler: Profiler, stage: str) -> None:
+        self.profiler = profiler
+        self.stage = stage
+
+    @property
+    def enabled(self) -> bool:
+        """Whether timings are recorded"""
+        return self.profiler.enabled
+
+    @contextmanager
+    def span(self, category: str, name: str):
+        """Context manager timing host work"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self.profiler.lock:
+                self.profiler.host_spans.append(
+                    (
+                        self.stage,
+                        category,
+                        name,
+                        threading.current_thread().name,
+                        start,
+                        end,
+                    )
+                )
+
+    def event(self, category: str, name: str, track: str, event: cl.Event) -> None:
+        """Record an OpenCL event to be timed once it has completed"""
+        if not self.enabled or event is None:
+            return
+        with self.profiler.lock:
+            self.profiler.device_events.append(
+                (self.stage, category, name, track, event)
+            )
+
+
+DISABLED = Profiler(enabled=False)
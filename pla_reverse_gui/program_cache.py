@@ -0,0 +1,112 @@
+"""Persistent on-disk cache of built OpenCL programs"""
+
+import hashlib
+import os
+import struct
+from typing import Callable
+
+import pyopencl as cl
+from platformdirs import user_cache_dir
+
+CACHE_DIRECTORY = os.path.join(user_cache_dir("pla-reverse-gui", False), "programs")
+# total size of all cached binaries before the least recently used are evicted
+MAX_CACHE_SIZE = 256 * 1024 * 1024
+
+
+def program_key(context: cl.Context, source: str, options: tuple[str] = ()) -> str:
+    """Hash program source along with the identity of every device and driver"""
+    hasher = hashlib.sha256(source.encode())
+    hasher.update(" ".join(options).encode())
+    hasher.update(cl.VERSION_TEXT.encode())
+    for device in context.devices:
+        for info in (
+            device.platform.name,
+            device.platform.version,
+            device.name,
+            device.version,
+            device.driver_version,
+        ):
+            hasher.update(info.encode())
+    return hasher.hexdigest()
+
+
+def read_binaries(path: str) -> list[bytes]:
+    """Read length-prefixed program binaries from a cache entry"""
+    with open(path, "rb") as cache_file:
+        data = cache_file.read()
+    (count,) = struct.unpack_from("<I", data)
+    lengths = struct.unpack_from(f"<{count}Q", data, 4)
+    offset = 4 + 8 * count
+    binaries = []
+    for length in lengths:
+        binaries.append(data[offset : offset + length])
+        offset += length
+    return binaries
+
+
+def write_binaries(path: str, binaries: list[bytes]) -> None:
+    """Write length-prefixed program binaries to a cache entry"""
+    # write to a temporary file first so that a partially written entry is never loaded
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as cache_file:
+        cache_file.write(struct.pack("<I", len(binaries)))
+        cache_file.write(struct.pack(f"<{len(binaries)}Q", *map(len, binaries)))
+        for binary in binaries:
+            cache_file.write(binary)
+    os.replace(temp_path, path)
+
+
+def evict(max_size: int = MAX_CACHE_SIZE) -> None:
+    """Remove the least recently used cache entries until the cache fits in max_size"""
+    entries = []
+    for entry in os.scandir(CACHE_DIRECTORY):
+        if entry.is_file() and entry.name.endswith(".bin"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total_size <= max_size:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total_size -= size
+
+
+def build_program(
+    context: cl.Context,
+    source: str,
+    options: tuple[str] = (),
+    log: Callable[[str], None] = None,
+) -> cl.Program:
+    """Build an OpenCL program, reusing saved binaries when the same program was built before"""
+    key = program_key(context, source, options)
+    path = os.path.join(CACHE_DIRECTORY, f"{key}.bin")
+    if os.path.exists(path):
+        try:
+            program = cl.Program(
+                context, context.devices, read_binaries(path)
+            ).build(options=list(options))
+            # bump modification time so that eviction is least recently used
+            os.utime(path)
+            if log is not None:
+                log(f"Program cache hit ({key[:16]}).")
+            return program
+        except (cl.Error, OSError, struct.error):
+            # stale or corrupted binaries (e.g. after a driver update), rebuild from source
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    if log is not None:
+        log(f"Program cache miss ({key[:16]}), building from source....")
+    program = cl.Program(context, source).build(options=list(options))
+    try:
+        os.makedirs(CACHE_DIRECTORY, exist_ok=True)
+        write_binaries(path, program.get_info(cl.program_info.BINARIES))
+        evict()
+    except OSError:
+        # caching is best effort, a read-only cache directory should not fail the search
+        pass
+    return program
@@ -0,0 +1,109 @@
+"""Persistent cache of verified fixed seed search results"""
+
+import hashlib
+import json
+import os
+import zipfile
+
+import numpy as np
+from platformdirs import user_cache_dir, user_config_dir
+
+CACHE_DIRECTORY = os.path.join(user_cache_dir("pla-reverse-gui", False), "fixed_seeds")
+SETTINGS_PATH = os.path.join(
+    user_config_dir("pla-reverse-gui", False), "result_cache.json"
+)
+# total size of all cached results before the least recently used are evicted
+DEFAULT_MAX_CACHE_SIZE = 64 * 1024 * 1024
+
+
+def max_cache_size() -> int:
+    """Byte budget of the cache, configurable with "max_size" in SETTINGS_PATH"""
+    try:
+        with open(SETTINGS_PATH, "r", encoding="utf-8") as settings_file:
+            return int(json.load(settings_file)["max_size"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return DEFAULT_MAX_CACHE_SIZE
+
+
+def result_key(
+    species_form: tuple[int, int],
+    shiny_rolls: int,
+    min_ivs: tuple[int],
+    max_ivs: tuple[int],
+    ability: int,
+    nature: int,
+    gender: int,
+    gender_ratio: int,
+    sizes: np.ndarray,
+) -> str:
+    """Hash every observed value that determines the fixed seeds of a pokemon"""
+    hasher = hashlib.sha256(
+        repr(
+            (
+                tuple(species_form),
+                shiny_rolls,
+                tuple(min_ivs),
+                tuple(max_ivs),
+                ability,
+                nature,
+                gender,
+                gender_ratio,
+            )
+        ).encode()
+    )
+    hasher.update(sizes.tobytes())
+    return hasher.hexdigest()
+
+
+def load_results(key: str) -> np.ndarray:
+    """Load cached results, None on a cache miss"""
+    path = os.path.join(CACHE_DIRECTORY, f"{key}.npz")
+    try:
+        with np.load(path) as cache_file:
+            results = cache_file["results"]
+        # bump modification time so that eviction is least recently used
+        os.utime(path)
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+        # missing, or corrupted by a crash or a full disk
+        return None
+    return results
+
+
+def save_results(key: str, results: np.ndarray) -> None:
+    """Save results to the cache and evict old entries that exceed the budget"""
+    path = os.path.join(CACHE_DIRECTORY, f"{key}.npz")
+    try:
+        os.makedirs(CACHE_DIRECTORY, exist_ok=True)
+        # write to a temporary file first so that a partially written entry is never loaded
+        temp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(temp_path, results=results)
+        os.replace(temp_path, path)
+        evict()
+    except OSError:
+        # caching is best effort and should not fail the search
+        pass
+
+
+def evict(max_size: int = None) -> None:
+    """Remove the least recently used entries until the cache fits in max_size"""
+    if max_size is None:
+        max_size = max_cache_size()
+    entries = []
+    for entry in os.scandir(CACHE_DIRECTORY):
+        # temporary files are still being written by save_results
+        if (
+            entry.is_file()
+            and entry.name.endswith(".npz")
+            and not entry.name.endswith(".tmp.npz")
+        ):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total_size <= max_size:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total_size -= size
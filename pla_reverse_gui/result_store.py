@@ -0,0 +1,155 @@
+"""Overflow-safe storage of kernel results"""
+
+import numpy as np
+import pyopencl as cl
+
+from .compute_context import ComputeContext
+from .profiling import DISABLED, StageProfiler
+
+
+class ResultStore:
+    """Growable host array that results are appended to"""
+
+    def __init__(self, capacity: int = 1024, dtype=np.uint64) -> None:
+        self.data = np.empty(max(capacity, 1), dtype)
+        self.size = 0
+
+    def extend(self, values: np.ndarray) -> None:
+        """Append values, doubling the capacity when needed"""
+        required = self.size + len(values)
+        if required > len(self.data):
+            data = np.empty(max(required, len(self.data) * 2), self.data.dtype)
+            data[: self.size] = self.data[: self.size]
+            self.data = data
+        self.data[self.size : required] = values
+        self.size = required
+
+    def result(self) -> np.ndarray:
+        """All appended values"""
+        return self.data[: self.size]
+
+
+class DeviceResults:
+    """
+    Device result buffer and counter that are drained into a host store as they fill up
+    Kernels append results with an atomic counter and drop any result past the capacity,
+    so a counter above the capacity after a chunk means that chunk overflowed
+    The counter buffer holds (count, capacity) and the result buffer has one more slot
+    than the capacity, for kernels that write every result past the capacity to it
+    All transfers are done on queue, which may differ from the queue kernels are run on,
+    kernels writing to these buffers should wait for ready_event
+    """
+
+    # drain once the buffer is this full so the next chunk is unlikely to overflow
+    DRAIN_THRESHOLD = 0.5
+
+    def __init__(
+        self,
+        compute_context: ComputeContext,
+        queue: cl.CommandQueue,
+        capacity: int,
+        count_dtype=np.uint32,
+        profiler: StageProfiler = None,
+        track: str = "transfer",
+    ) -> None:
+        self.compute_context = compute_context
+        self.queue = queue
+        self.profiler = profiler or DISABLED.stage("")
+        # trace track that transfers are recorded to
+        self.track = track
+        self.count_dtype = count_dtype
+        self.count = 0
+        self.overflowed = False
+        self.store = ResultStore(capacity)
+        self.count_buffer = compute_context.upload(
+            queue, np.zeros(2, count_dtype), cl.mem_flags.READ_WRITE
+        )
+        self.ready_event: cl.Event = None
+        self.results_buffer: cl.Buffer = None
+        self.capacity = 0
+        self.allocate(capacity)
+
+    def allocate(self, capacity: int) -> None:
+        """(Re)allocate the device result buffer with at least capacity slots"""
+        if self.results_buffer is not None:
+            self.compute_context.release_buffer(self.results_buffer)
+        # host accessible memory, results are a mapped read instead of enqueue_copy
+        self.results_buffer = self.compute_context.acquire_buffer(
+            (max(capacity, 1) + 1) * 8,
+            cl.mem_flags.READ_WRITE | cl.mem_flags.ALLOC_HOST_PTR,
+        )
+        # pooled buffers may be larger than requested
+        self.capacity = self.results_buffer.size // 8 - 1
+        self.reset_count()
+
+    def reset_count(self) -> None:
+        """Reset the device counter and store the capacity next to it"""
+        self.ready_event = cl.enqueue_copy(
+            self.queue,
+            self.count_buffer,
+            np.array((0, self.capacity), self.count_dtype),
+        )
+        self.profiler.event("transfer", "reset count", self.track, self.ready_event)
+        self.count = 0
+
+    @property
+    def wait_for(self) -> list[cl.Event]:
+        """Events a kernel writing to these buffers must wait for"""
+        return None if self.ready_event is None else [self.ready_event]
+
+    def read_count(self, wait_for: list[cl.Event] = None) -> int:
+        """Read the device counter"""
+        host_count = np.empty(1, self.count_dtype)
+        self.ready_event = cl.enqueue_copy(
+            self.queue, host_count, self.count_buffer, wait_for=wait_for
+        )
+        self.profiler.event("transfer", "read count", self.track, self.ready_event)
+        return int(host_count[0])
+
+    def drain(self, count: int) -> None:
+        """
+        Append the first count results to the host store and reset the device counter
+        The results are a mapped read instead of enqueue_copy, and the store copies
+        them once before the buffer is unmapped, since the buffer is reused for the
+        next chunk and the host store outlives it
+        """
+        if count:
+            host_results, map_event = cl.enqueue_map_buffer(
+                self.queue,
+                self.results_buffer,
+                cl.map_flags.READ,
+                0,
+                (count,),
+                np.uint64,
+            )
+            self.profiler.event("transfer", "map results", self.track, map_event)
+            self.store.extend(host_results)
+            host_results.base.release(self.queue)
+        self.reset_count()
+
+    def check_chunk(self, wait_for: list[cl.Event] = None) -> bool:
+        """Check the counter after a chunk, False if the chunk overflowed and must be re-run"""
+        new_count = self.read_count(wait_for)
+        if new_count > self.capacity:
+            self.overflowed = True
+            # results from before this chunk are intact, keep them and grow to fit the chunk
+            chunk_count = new_count - self.count
+            self.drain(self.count)
+            self.allocate(2 * chunk_count)
+            return False
+        self.count = new_count
+        if self.count >= self.capacity * self.DRAIN_THRESHOLD:
+            self.drain(self.count)
+        return True
+
+    def collect(self) -> np.ndarray:
+        """Drain the remaining results and return a copy of every result so far"""
+        self.drain(self.count)
+        return self.store.result().copy()
+
+    def finish(self) -> np.ndarray:
+        """Drain the remaining results, release the device buffers and return every result"""
+        self.drain(self.count)
+        self.compute_context.release_buffer(self.results_buffer)
+        self.compute_context.release_buffer(self.count_buffer)
+        return self.store.result()
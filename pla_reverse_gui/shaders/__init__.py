@@ -0,0 +1,25 @@
+"""OpenCL shaders maintained alongside the GUI"""
+
+import os
+
+SHADER_DIRECTORY = os.path.dirname(__file__)
+# shaders whose source is prepended to every built shader
+COMMON_SHADERS = ("xoroshiro",)
+
+
+def load_shader_source(shader_name: str) -> str:
+    """Load the raw source of a shader"""
+    with open(
+        os.path.join(SHADER_DIRECTORY, f"{shader_name}.cl"), "r", encoding="utf-8"
+    ) as shader_file:
+        return shader_file.read()
+
+
+def build_shader_code(shader_name: str, kernel_constants: dict) -> str:
+    """Build a shader's source with a #define for each kernel constant"""
+    defines = "".join(
+        f"#define {name} {value}\n" for name, value in kernel_constants.items()
+    )
+    return "\n".join(
+        (defines, *map(load_shader_source, COMMON_SHADERS), load_shader_source(shader_name))
+    )
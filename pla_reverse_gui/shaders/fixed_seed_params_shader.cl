@@ -0,0 +1,113 @@
+// Fixed seed search with every pokemon dependent value passed at runtime
+// so that a single build serves every fixed seed search in a session
+
+// layout of the params argument
+#define PARAM_SHINY_ROLLS 0
+#define PARAM_TWO_ABILITIES 1
+// abilities, genders and natures are bitmasks of every allowed value
+#define PARAM_ABILITIES 2
+#define PARAM_GENDER_RATIO 3
+#define PARAM_GENDERS 4
+#define PARAM_NATURES 5
+#define PARAM_MIN_IVS 6
+#define PARAM_MAX_IVS 12
+
+// regenerate the pokemon from a fixed seed and check it against every known value
+inline bool check_fixed_seed(
+    ulong seed,
+    constant uint *params,
+    constant ulong *sizes
+) {
+    xoroshiro rng;
+    xoroshiro_init(&rng, seed);
+    // encryption constant, sidtid, pid rolls
+    xoroshiro_advance(&rng, 2 + params[PARAM_SHINY_ROLLS]);
+    for (uint i = 0; i < 6; i++) {
+        uint iv = xoroshiro_next(&rng) & 31;
+        if (iv < params[PARAM_MIN_IVS + i] || iv > params[PARAM_MAX_IVS + i]) {
+            return false;
+        }
+    }
+    uint ability = xoroshiro_next(&rng) & 1;
+    if (params[PARAM_TWO_ABILITIES] && !((params[PARAM_ABILITIES] >> ability) & 1)) {
+        return false;
+    }
+    uint gender_ratio = params[PARAM_GENDER_RATIO];
+    if (1 <= gender_ratio && gender_ratio <= 253) {
+        uint gender = (xoroshiro_rand(&rng, 253, 0xFF) + 1) < gender_ratio;
+        if (!((params[PARAM_GENDERS] >> gender) & 1)) {
+            return false;
+        }
+    }
+    uint nature = xoroshiro_rand(&rng, 25, 0x1F);
+    if (!((params[PARAM_NATURES] >> nature) & 1)) {
+        return false;
+    }
+    uint height = xoroshiro_rand(&rng, 0x81, 0xFF) + xoroshiro_rand(&rng, 0x80, 0x7F);
+    uint weight = xoroshiro_rand(&rng, 0x81, 0xFF) + xoroshiro_rand(&rng, 0x80, 0x7F);
+    // sizes is a 256x256 bitset indexed by (height << 8) | weight
+    uint size_index = (height << 8) | weight;
+    return (sizes[size_index >> 6] >> (size_index & 63)) & 1;
+}
+
+// each work item guesses the low 5 bits of s0 for every iv rand,
+// which determines the low 5 bits of s1 and gives a 60 bit target vector
+// target bits [10 * i, 10 * i + 5) are s0's and [10 * i + 5, 10 * i + 10) are s1's for iv i
+inline ulong iv_target(uint3 guesses, const uint *ivs) {
+    uint guess_words[3] = {guesses.x, guesses.y, guesses.z};
+    ulong target = 0;
+    for (uint i = 0; i < 6; i++) {
+        uint s0_bits = (guess_words[i >> 1] >> (5 * (i & 1))) & 31;
+        uint s1_bits = (ivs[i] - s0_bits) & 31;
+        target |= (ulong)(s0_bits | (s1_bits << 5)) << (10 * i);
+    }
+    return target;
+}
+
+kernel void find_fixed_seeds_split(
+    global uint *count,
+    global ulong *results,
+    uint capacity,
+    constant ulong *seed_mat,
+    uint seed_mat_size,
+    constant ulong *null_space,
+    uint null_space_size,
+    ulong iv_const,
+    constant uint *params,
+    constant ulong *sizes,
+    uint offset
+) {
+    uint slice = get_global_id(0) + offset;
+    // slices [1024 * c, 1024 * (c + 1)) search the c-th combination of ivs within the ranges
+    uint combination = slice >> 10;
+    uint ivs[6];
+    for (uint i = 0; i < 6; i++) {
+        uint range_size = params[PARAM_MAX_IVS + i] - params[PARAM_MIN_IVS + i] + 1;
+        ivs[i] = params[PARAM_MIN_IVS + i] + combination % range_size;
+        combination /= range_size;
+    }
+    uint3 guesses = (uint3)(slice & 1023, get_global_id(1), get_global_id(2));
+    ulong target = iv_target(guesses, ivs) ^ iv_const;
+    ulong seed = 0;
+    for (uint bit = 0; bit < seed_mat_size; bit++) {
+        if ((target >> bit) & 1) {
+            seed ^= seed_mat[bit];
+        }
+    }
+    // every seed in the coset of the nullspace gives the same iv bits
+    for (uint combination = 0; combination < (1U << null_space_size); combination++) {
+        ulong candidate = seed;
+        for (uint bit = 0; bit < null_space_size; bit++) {
+            if ((combination >> bit) & 1) {
+                candidate ^= null_space[bit];
+            }
+        }
+        if (check_fixed_seed(candidate, params, sizes)) {
+            uint index = atomic_inc(count);
+            // results past the capacity are dropped, the host sees the overflow in count
+            if (index < capacity) {
+                results[index] = candidate;
+            }
+        }
+    }
+}
@@ -0,0 +1,16 @@
+// Batched entry point appended to the upstream generator_seed_shader
+// every work item runs its part of the search for batch_size consecutive fixed seeds,
+// so a single launch covers a strip of the fixed seed array
+
+kernel void find_generator_seeds_batched(
+    global ulong *count,
+    global ulong *results,
+    global ulong *slices,
+    global ulong *seeds,
+    uint offset,
+    uint batch_size
+) {
+    for (uint i = 0; i < batch_size; i++) {
+        find_generator_seeds(count, results, slices, seeds, offset + i);
+    }
+}
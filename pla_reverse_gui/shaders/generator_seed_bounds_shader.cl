@@ -0,0 +1,16 @@
+// Prepended to the upstream generator_seed_shader, which appends results with atom_inc
+// but does not check the capacity of its result buffer
+// the counter buffer holds (count, capacity) and the result buffer has a slot past
+// the capacity, so every result past the capacity is written to that slot instead
+// while the counter keeps counting so the overflow is still detected
+
+#pragma OPENCL EXTENSION cl_khr_int64_base_atomics : enable
+
+inline ulong bounded_atom_inc(volatile global ulong *count) {
+    ulong index = atom_inc(count);
+    return min(index, count[1]);
+}
+
+// some drivers define atom_inc as a macro themselves
+#undef atom_inc
+#define atom_inc(count) bounded_atom_inc(count)
@@ -0,0 +1,56 @@
+// Group seed search that collects every candidate instead of a single result
+// each work item derives the group seed of one generator seed of pokemon 1
+// and checks if the fixed seed it gives pokemon 2 was found by the fixed seed search
+
+// the first generator seed of a group seed is its first rand
+#define GROUP_SEED(generator_seed) ((generator_seed) - XOROSHIRO_CONST)
+
+// check if value is in the sorted array
+inline bool sorted_contains(global ulong *sorted, uint size, ulong value) {
+    uint low = 0;
+    uint high = size;
+    while (low < high) {
+        uint middle = low + (high - low) / 2;
+        if (sorted[middle] < value) {
+            low = middle + 1;
+        } else {
+            high = middle;
+        }
+    }
+    return low < size && sorted[low] == value;
+}
+
+kernel void find_group_seeds(
+    global uint *count,
+    global ulong *results,
+    uint capacity,
+    global ulong *generator_seeds,
+    global ulong *fixed_seeds,
+    uint fixed_seeds_size,
+    uint is_multi_spawner
+) {
+    ulong group_seed = GROUP_SEED(generator_seeds[get_global_id(0)]);
+    xoroshiro rng;
+    xoroshiro_init(&rng, group_seed);
+    // generator seed and alpha rand of pokemon 1
+    xoroshiro_advance(&rng, 2);
+    ulong generator_seed;
+    if (is_multi_spawner) {
+        generator_seed = xoroshiro_next(&rng);
+    } else {
+        // single spawners reseed their group rng after every spawn
+        xoroshiro_init(&rng, xoroshiro_next(&rng));
+        generator_seed = xoroshiro_next(&rng);
+    }
+    xoroshiro_init(&rng, generator_seed);
+    // slot rand
+    xoroshiro_next(&rng);
+    ulong fixed_seed = xoroshiro_next(&rng);
+    if (sorted_contains(fixed_seeds, fixed_seeds_size, fixed_seed)) {
+        uint index = atomic_inc(count);
+        // candidates past the capacity are dropped, the host sees the overflow in count
+        if (index < capacity) {
+            results[index] = group_seed;
+        }
+    }
+}
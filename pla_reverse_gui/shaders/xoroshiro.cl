@@ -0,0 +1,38 @@
+// Xoroshiro128+ as used by PLA, with the rejection sampling of next_rand
+
+#define XOROSHIRO_CONST 0x82A2B175229D6A5BUL
+
+typedef struct {
+    ulong s0;
+    ulong s1;
+} xoroshiro;
+
+inline void xoroshiro_init(xoroshiro *rng, ulong seed) {
+    rng->s0 = seed;
+    rng->s1 = XOROSHIRO_CONST;
+}
+
+inline ulong xoroshiro_next(xoroshiro *rng) {
+    ulong s0 = rng->s0;
+    ulong s1 = rng->s1;
+    ulong result = s0 + s1;
+    s1 ^= s0;
+    rng->s0 = rotate(s0, 24UL) ^ s1 ^ (s1 << 16);
+    rng->s1 = rotate(s1, 37UL);
+    return result;
+}
+
+inline void xoroshiro_advance(xoroshiro *rng, uint advances) {
+    for (uint i = 0; i < advances; i++) {
+        xoroshiro_next(rng);
+    }
+}
+
+// mask must be the smallest 2^n - 1 that is >= maximum - 1
+inline uint xoroshiro_rand(xoroshiro *rng, uint maximum, ulong mask) {
+    ulong result;
+    do {
+        result = xoroshiro_next(rng) & mask;
+    } while (result >= maximum);
+    return (uint)result;
+}
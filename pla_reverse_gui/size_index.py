@@ -0,0 +1,58 @@
+"""Memoized index of the (height, weight) scalars possible for size measurements"""
+
+from functools import lru_cache
+
+import numpy as np
+
+from .pla_reverse_main import pla_reverse
+from .util import get_personal_index
+
+# 256x256 bitset of (height, weight) scalar pairs indexed by (height << 8) | weight
+BITSET_WORDS = 256 * 256 // 64
+
+
+def sizes_bitset(sizes_set: set[tuple[int, int]]) -> np.ndarray:
+    """Build a 256x256 bitset of (height, weight) pairs indexed by (height << 8) | weight"""
+    bits = np.zeros(256 * 256, np.uint8)
+    for height, weight in sizes_set:
+        bits[(height << 8) | weight] = 1
+    return np.packbits(bits, bitorder="little").view(np.uint64)
+
+
+def bitset_sizes(bitset: np.ndarray) -> set[tuple[int, int]]:
+    """Convert a bitset back to a set of (height, weight) pairs"""
+    indices = np.flatnonzero(np.unpackbits(bitset.view(np.uint8), bitorder="little"))
+    return set(zip((indices >> 8).tolist(), (indices & 0xFF).tolist()))
+
+
+def bitset_count(bitset: np.ndarray) -> int:
+    """Count the (height, weight) pairs in a bitset"""
+    return int(np.unpackbits(bitset.view(np.uint8)).sum())
+
+
+@lru_cache(maxsize=4096)
+def measurement_bitset(
+    personal_index: int, height, weight: float, imperial: bool
+) -> np.ndarray:
+    """Bitset of the (height, weight) pairs that display as a measurement"""
+    bitset = sizes_bitset(
+        pla_reverse.size.all_possible_sizes(personal_index, height, weight, imperial)
+    )
+    # cached bitsets are shared by every caller
+    bitset.flags.writeable = False
+    return bitset
+
+
+def possible_sizes_bitset(
+    measured_species: list[tuple[int, int]],
+    heights: list,
+    weights: list[float],
+    imperial: bool,
+) -> np.ndarray:
+    """Intersect the bitsets of every measurement, all sizes if there are none"""
+    bitset = np.full(BITSET_WORDS, np.iinfo(np.uint64).max, np.uint64)
+    for species_form, height, weight in zip(measured_species, heights, weights):
+        bitset &= measurement_bitset(
+            get_personal_index(*species_form), height, weight, imperial
+        )
+    return bitset
@@ -214,6 +214,21 @@ def get_personal_index(species: int, form: int = 0) -> int:
     return PERSONAL_INFO_LA[species].form_stats_index + form - 1
 
 
+def get_gender_ratio(species_form: tuple[int, int], basculin_gender: int = None) -> int:
+    """Return the gender ratio of a pokemon, accounting for forced gender basculin"""
+    if basculin_gender is not None and tuple(species_form) == (550, 2):
+        return (0, 254)[basculin_gender]
+    return get_personal_info(*species_form).gender_ratio
+
+
+def iv_combinations(min_ivs: tuple[int], max_ivs: tuple[int]) -> int:
+    """Count the combinations of ivs within per stat [min, max] ranges"""
+    combinations = 1
+    for min_iv, max_iv in zip(min_ivs, max_ivs):
+        combinations *= max(max_iv - min_iv + 1, 0)
+    return combinations
+
+
 def find_evo_line(species: int, form: int = 0) -> tuple[tuple[int, int]]:
     """Find the evolution line of a pokemon given its species and form"""
     return next(
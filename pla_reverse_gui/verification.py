@@ -0,0 +1,139 @@
+"""Batch verification of fixed seed search results"""
+
+import numba
+import numpy as np
+from numba_pokemon_prngs.xorshift import Xoroshiro128PlusRejection
+
+# layout of the params array, shared with fixed_seed_params_shader
+PARAM_SHINY_ROLLS = 0
+PARAM_TWO_ABILITIES = 1
+# abilities, genders and natures are bitmasks of every allowed value
+PARAM_ABILITIES = 2
+PARAM_GENDER_RATIO = 3
+PARAM_GENDERS = 4
+PARAM_NATURES = 5
+PARAM_MIN_IVS = 6
+PARAM_MAX_IVS = 12
+
+# verification status codes, in the order they are checked
+VALID = 0
+WRONG_IVS = 1
+WRONG_ABILITY = 2
+WRONG_GENDER = 3
+WRONG_NATURE = 4
+WRONG_SIZE = 5
+STATUS_NAMES = ("Valid", "IVs", "Ability", "Gender", "Nature", "Height/Weight")
+
+# masks of every possible ability, gender and nature
+ANY_ABILITY = (1 << 2) - 1
+ANY_GENDER = (1 << 2) - 1
+ANY_NATURE = (1 << 25) - 1
+
+
+def value_mask(value: int, any_mask: int) -> int:
+    """Bitmask of a known value, or any_mask if the value is unknown (None)"""
+    return any_mask if value is None else 1 << value
+
+
+@numba.njit(nogil=True)
+def fixed_seed_status(
+    rng: Xoroshiro128PlusRejection,
+    seed: np.uint64,
+    params: np.ndarray,
+    sizes: np.ndarray,
+) -> int:
+    """Regenerate the pokemon from a fixed seed and return the first mismatched value"""
+    rng.re_init(seed)
+    # encryption constant, sidtid, pid rolls
+    rng.advance(2 + params[PARAM_SHINY_ROLLS])
+    for i in range(6):
+        iv = rng.next_rand(32)
+        if iv < params[PARAM_MIN_IVS + i] or iv > params[PARAM_MAX_IVS + i]:
+            return WRONG_IVS
+    ability = rng.next_rand(2)
+    if params[PARAM_TWO_ABILITIES] and not (params[PARAM_ABILITIES] >> ability) & 1:
+        return WRONG_ABILITY
+    gender_ratio = params[PARAM_GENDER_RATIO]
+    if 1 <= gender_ratio <= 253:
+        gender = int((rng.next_rand(253) + 1) < gender_ratio)
+        if not (params[PARAM_GENDERS] >> gender) & 1:
+            return WRONG_GENDER
+    if not (params[PARAM_NATURES] >> rng.next_rand(25)) & 1:
+        return WRONG_NATURE
+    height = rng.next_rand(0x81) + rng.next_rand(0x80)
+    weight = rng.next_rand(0x81) + rng.next_rand(0x80)
+    # sizes is a 256x256 bitset indexed by (height << 8) | weight
+    size_index = np.uint64((height << 8) | weight)
+    if not (
+        (sizes[size_index >> np.uint64(6)] >> (size_index & np.uint64(63)))
+        & np.uint64(1)
+    ):
+        return WRONG_SIZE
+    return VALID
+
+
+@numba.njit(parallel=True, nogil=True)
+def verify_fixed_seeds(
+    seeds: np.ndarray, params: np.ndarray, sizes: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Verify every fixed seed, returning a validity mask and a status code per seed"""
+    statuses = np.empty(len(seeds), np.uint8)
+    for i in numba.prange(len(seeds)):
+        rng = Xoroshiro128PlusRejection(0, 0)
+        statuses[i] = fixed_seed_status(rng, seeds[i], params, sizes)
+    return statuses == VALID, statuses
+
+
+@numba.njit(nogil=True)
+def sorted_contains(sorted_array: np.ndarray, value: np.uint64) -> bool:
+    """Check if value is in the sorted array"""
+    index = np.searchsorted(sorted_array, value)
+    return index < len(sorted_array) and sorted_array[index] == value
+
+
+@numba.njit(nogil=True)
+def group_seed_fixed_seeds(
+    rng: Xoroshiro128PlusRejection, group_seed: np.uint64, is_multi_spawner: bool
+) -> tuple[np.uint64, np.uint64]:
+    """Regenerate the fixed seeds of the first two pokemon spawned by a group seed"""
+    rng.re_init(group_seed)
+    generator_seed_1 = rng.next()
+    # alpha rand
+    rng.next()
+    if is_multi_spawner:
+        generator_seed_2 = rng.next()
+    else:
+        # single spawners reseed their group rng after every spawn
+        rng.re_init(rng.next())
+        generator_seed_2 = rng.next()
+    rng.re_init(generator_seed_1)
+    # slot rand
+    rng.next()
+    fixed_seed_1 = rng.next()
+    rng.re_init(generator_seed_2)
+    rng.next()
+    fixed_seed_2 = rng.next()
+    return fixed_seed_1, fixed_seed_2
+
+
+@numba.njit(parallel=True, nogil=True)
+def verify_group_seeds(
+    group_seeds: np.ndarray,
+    is_multi_spawner: bool,
+    fixed_seeds_1: np.ndarray,
+    fixed_seeds_2: np.ndarray,
+) -> np.ndarray:
+    """
+    Verify that every group seed spawns both pokemon, returning a validity mask
+    fixed_seeds_1 and fixed_seeds_2 must be sorted verified fixed seed search results
+    """
+    valid = np.empty(len(group_seeds), np.bool_)
+    for i in numba.prange(len(group_seeds)):
+        rng = Xoroshiro128PlusRejection(0, 0)
+        fixed_seed_1, fixed_seed_2 = group_seed_fixed_seeds(
+            rng, group_seeds[i], is_multi_spawner
+        )
+        valid[i] = sorted_contains(fixed_seeds_1, fixed_seed_1) and sorted_contains(
+            fixed_seeds_2, fixed_seed_2
+        )
+    return valid
@@ -29,7 +29,9 @@ class IVCalculatorWindow(QDialog):
         self.species_form = species_form
         self.nature = nature
         self.setWindowTitle(
-            f"IV Calculator - {NATURES_EN[nature]} {get_name_en(*species_form)}"
+            "IV Calculator - "
+            f"{'Any Nature' if nature is None else NATURES_EN[nature]} "
+            f"{get_name_en(*species_form)}"
         )
         self.setModal(True)
         self.main_layout = QVBoxLayout(self)
@@ -92,11 +94,11 @@ class IVCalculatorWindow(QDialog):
                 spinbox.deleteLater()
             remove_row_button.deleteLater()
 
-    def get_ivs(self) -> tuple[int, int, int, int, int, int]:
-        """Function to get the calculated ivs after the window is closed"""
-        if all(len(iv_range) == 1 for iv_range in self.iv_ranges):
-            return tuple(iv_range[0] for iv_range in self.iv_ranges)
-        raise Exception("IVs could not be calculated to precise values")
+    def get_ivs(self) -> tuple[range, range, range, range, range, range]:
+        """Function to get the calculated iv ranges after the window is closed"""
+        if all(len(iv_range) > 0 for iv_range in self.iv_ranges):
+            return tuple(self.iv_ranges)
+        raise Exception("IVs could not be calculated")
 
     def add_row(self) -> None:
         """Callback for when the add row button is clicked"""
@@ -206,12 +208,28 @@ class IVCalculatorWindow(QDialog):
                 except IndexError:
                     return range(32, 0)
 
+            def union(ranges):
+                ranges = [iv_range for iv_range in ranges if len(iv_range) > 0]
+                if not ranges:
+                    return range(32, 0)
+                return range(
+                    min(iv_range.start for iv_range in ranges),
+                    max(iv_range.stop for iv_range in ranges),
+                )
+
+            # an unknown nature allows the ivs of every nature
+            natures = range(25) if self.nature is None else (self.nature,)
             self.iv_ranges = [
-                try_intersect(x, y)
+                try_intersect(x, union(y))
                 for x, y in zip(
                     self.iv_ranges,
-                    IVCalculatorWindow.calc_ivs(
-                        base_stats, stats, level, np.int8(self.nature)
+                    zip(
+                        *(
+                            IVCalculatorWindow.calc_ivs(
+                                base_stats, stats, level, np.int8(nature)
+                            )
+                            for nature in natures
+                        )
                     ),
                 )
             ]
@@ -228,6 +246,7 @@ class IVCalculatorWindow(QDialog):
                     i,
                     1,
                 )
+        # ivs that are still ranges are searched over every value in the range
         self.confirm_button.setDisabled(
-            any(len(iv_range) != 1 for iv_range in self.iv_ranges)
+            any(len(iv_range) == 0 for iv_range in self.iv_ranges)
         )
@@ -6,17 +6,23 @@ from qtpy.QtWidgets import (
     QPushButton,
     QSpinBox,
     QDoubleSpinBox,
+    QLabel,
     QVBoxLayout,
     QWidget,
 )
 
 # pylint: enable=no-name-in-module
+from qtpy.QtCore import Signal
+
+from ..size_index import bitset_count, possible_sizes_bitset
 from ..util import get_name_en, find_evo_line
 
 
 class MeasurementWidget(QWidget):
     """Height and Weight measurement widget"""
 
+    changed = Signal()
+
     def __init__(
         self,
     ) -> None:
@@ -30,11 +36,13 @@ class MeasurementWidget(QWidget):
         )
         self.add_measurement_button = QPushButton("Add Measurement")
         self.add_measurement_button.clicked.connect(self.new_measurement)
+        self.possible_sizes_label = QLabel()
         self.base_species_form: tuple[int, int] = None
         self.evo_line: tuple[tuple[int, int]] = ()
         self.measurements = []
         self.main_layout.addWidget(self.measurement_system_combobox)
         self.main_layout.addWidget(self.add_measurement_button)
+        self.main_layout.addWidget(self.possible_sizes_label)
 
     def update_base_species_form(self, species_form: tuple[int, int]) -> None:
         """Update base species and form"""
@@ -94,6 +102,10 @@ class MeasurementWidget(QWidget):
         height_metric.setVisible(not imperial)
         weight.setSuffix(" lbs" if imperial else " kg")
         weight.setDecimals(1 if imperial else 2)
+        species.currentIndexChanged.connect(self.update_possible_sizes)
+        for spin_box in (height_feet, height_inches, height_metric, weight):
+            spin_box.valueChanged.connect(self.update_possible_sizes)
+        self.update_possible_sizes()
 
     def measurement_system_changed(self, index: int) -> None:
         """Callback for when the measurement system changes"""
@@ -119,6 +131,20 @@ class MeasurementWidget(QWidget):
             height_metric.setVisible(not imperial)
             weight_measurement.setSuffix(" lbs" if imperial else " kg")
             weight_measurement.setDecimals(1 if imperial else 2)
+        self.update_possible_sizes()
+
+    def update_possible_sizes(self) -> None:
+        """Show how many sizes are possible for the current measurements"""
+        if not self.measurements:
+            self.possible_sizes_label.setText("")
+        else:
+            possible_sizes = bitset_count(possible_sizes_bitset(*self.get_value()))
+            self.possible_sizes_label.setText(
+                f"{possible_sizes} possible sizes"
+                if possible_sizes
+                else "No possible sizes, check the measurements"
+            )
+        self.changed.emit()
 
     def get_value(self) -> tuple:
         """Get all size measurement values"""
@@ -18,6 +18,7 @@ from qtpy.QtWidgets import (
 )
 
 # pylint: enable=no-name-in-module
+from qtpy.QtCore import Signal
 
 from ..util import get_name_en, get_personal_info
 from .measurement_widget import MeasurementWidget
@@ -27,6 +28,9 @@ from .iv_calculator_window import IVCalculatorWindow
 class PokemonInfoWidget(QWidget):
     """Pokemon fixed info widget"""
 
+    # emitted whenever any value that affects the fixed seed search changes
+    changed = Signal()
+
     def __init__(
         self,
         title: str,
@@ -68,11 +72,24 @@ class PokemonInfoWidget(QWidget):
         self.nature_combobox = QComboBox()
         for i, nature in enumerate(NATURES_EN):
             self.nature_combobox.addItem(nature, i)
-        self.iv = QWidget()
-        self.iv_layout = QHBoxLayout(self.iv)
-        self.iv_widgets = [QSpinBox(minimum=0, maximum=31) for _ in range(6)]
-        for iv_widget in self.iv_widgets:
-            self.iv_layout.addWidget(iv_widget)
+        # unrecorded values are searched as every possible value at once
+        self.nature_combobox.addItem("Any", None)
+        # ivs that are not known exactly are searched over their [min, max] range
+        self.min_iv = QWidget()
+        self.min_iv_layout = QHBoxLayout(self.min_iv)
+        self.min_iv_layout.addWidget(QLabel("Min IVs:"))
+        self.min_iv_widgets = [QSpinBox(minimum=0, maximum=31) for _ in range(6)]
+        self.max_iv = QWidget()
+        self.max_iv_layout = QHBoxLayout(self.max_iv)
+        self.max_iv_layout.addWidget(QLabel("Max IVs:"))
+        self.max_iv_widgets = [QSpinBox(minimum=0, maximum=31) for _ in range(6)]
+        for min_iv_widget, max_iv_widget in zip(
+            self.min_iv_widgets, self.max_iv_widgets
+        ):
+            # raising the min above the max raises the max with it
+            min_iv_widget.valueChanged.connect(max_iv_widget.setMinimum)
+            self.min_iv_layout.addWidget(min_iv_widget)
+            self.max_iv_layout.addWidget(max_iv_widget)
         self.iv_calc_button = QPushButton("Calculate IVs")
         self.iv_calc_button.clicked.connect(self.iv_calc_button_clicked)
         self.gender_combobox = QComboBox()
@@ -82,11 +99,23 @@ class PokemonInfoWidget(QWidget):
         self.main_layout.addWidget(self.species_combobox)
         self.main_layout.addWidget(self.shiny_rolls_combobox)
         self.main_layout.addWidget(self.nature_combobox)
-        self.main_layout.addWidget(self.iv)
+        self.main_layout.addWidget(self.min_iv)
+        self.main_layout.addWidget(self.max_iv)
         self.main_layout.addWidget(self.iv_calc_button)
         self.main_layout.addWidget(self.gender_combobox)
         self.main_layout.addWidget(self.ability_combobox)
         self.main_layout.addWidget(self.measurements)
+        for combobox in (
+            self.species_combobox,
+            self.shiny_rolls_combobox,
+            self.nature_combobox,
+            self.gender_combobox,
+            self.ability_combobox,
+        ):
+            combobox.currentIndexChanged.connect(self.changed)
+        for iv_widget in self.min_iv_widgets + self.max_iv_widgets:
+            iv_widget.valueChanged.connect(self.changed)
+        self.measurements.changed.connect(self.changed)
         self.species_changed(0)
 
     def species_changed(self, index: int) -> None:
@@ -107,9 +136,12 @@ class PokemonInfoWidget(QWidget):
                 self.gender_combobox.addItem("Male", 0)
             if personal_info.gender_ratio > 0:
                 self.gender_combobox.addItem("Female", 1)
+            if 0 < personal_info.gender_ratio < 254:
+                self.gender_combobox.addItem("Any", None)
         self.ability_combobox.addItem(ABILITIES_EN[personal_info.ability_1], 0)
         if personal_info.ability_1 != personal_info.ability_2:
             self.ability_combobox.addItem(ABILITIES_EN[personal_info.ability_2], 1)
+            self.ability_combobox.addItem("Any", None)
 
     def iv_calc_button_clicked(self) -> None:
         """Callback for when the IV calc button is clicked"""
@@ -119,6 +151,11 @@ class PokemonInfoWidget(QWidget):
             self.nature_combobox.currentData(),
         )
         if iv_calc_window.exec_() == QDialog.Accepted:
-            ivs = iv_calc_window.get_ivs()
-            for iv, iv_widget in zip(ivs, self.iv_widgets):
-                iv_widget.setValue(iv)
+            iv_ranges = iv_calc_window.get_ivs()
+            for iv_range, min_iv_widget, max_iv_widget in zip(
+                iv_ranges, self.min_iv_widgets, self.max_iv_widgets
+            ):
+                # the max follows the min up, so it is lowered first
+                max_iv_widget.setMinimum(0)
+                max_iv_widget.setValue(iv_range[-1])
+                min_iv_widget.setValue(iv_range[0])
@@ -9,8 +9,11 @@ from numba_pokemon_prngs.data.fbs.encounter_la import PlacementSpawner8a
 
 # pylint: disable=no-name-in-module
 from qtpy.QtWidgets import (
+    QCheckBox,
+    QComboBox,
     QDialog,
     QHBoxLayout,
+    QLabel,
     QVBoxLayout,
     QWidget,
     QPushButton,
@@ -18,21 +21,36 @@ from qtpy.QtWidgets import (
 )
 
 # pylint: enable=no-name-in-module
-from qtpy.QtCore import Qt
+from qtpy.QtCore import Qt, Signal
 
 from .pokemon_info_widget import PokemonInfoWidget
 from .eta_progress_bar import ETAProgressBar
 from .log_spin_box_widget import LogSpinBox
+from ..compute_context import (
+    device_label,
+    list_devices,
+    select_device,
+    selected_device,
+)
+from ..estimator import PokemonEstimate, estimate_run, format_duration
+from ..matrix_table import cached_fixed_seed_matrices
+from ..profiling import Profiler
+from ..size_index import possible_sizes_bitset
+from ..util import get_gender_ratio, get_personal_info, iv_combinations
+from ..verification import ANY_ABILITY, ANY_GENDER, ANY_NATURE, value_mask
 from ..kernel_interface import (
     ComputeFixedSeedsThread,
     ComputeGeneratorSeedsThread,
     ComputeGroupSeedThread,
+    ComputeMatricesThread,
 )
 
 
 class ConsoleWindow(QDialog):
     """Console log window"""
 
+    cancelled = Signal()
+
     def __init__(self):
         super().__init__()
 
@@ -40,8 +58,11 @@ class ConsoleWindow(QDialog):
         self.text_edit = QTextEdit()
         self.text_edit.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
         self.progress_bar = ETAProgressBar()
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel)
         self.main_layout.addWidget(self.text_edit)
         self.main_layout.addWidget(self.progress_bar)
+        self.main_layout.addWidget(self.cancel_button)
 
         self.setWindowTitle("Console Window")
         self.setGeometry(100, 100, 640, 480)
@@ -53,6 +74,23 @@ class ConsoleWindow(QDialog):
             self.text_edit.verticalScrollBar().maximum()
         )
 
+    def cancel(self) -> None:
+        """Request cancellation of the running search"""
+        if not self.cancel_button.isEnabled():
+            return
+        self.cancel_button.setEnabled(False)
+        self.log("Cancelling....")
+        self.cancelled.emit()
+
+    def search_ended(self) -> None:
+        """Disable cancelling once the search is over"""
+        self.cancel_button.setEnabled(False)
+
+    def closeEvent(self, event):
+        # closing the console of a running search cancels it
+        self.cancel()
+        event.accept()
+
 
 class SeedFinderWindow(QDialog):
     """Seed finder window"""
@@ -66,20 +104,53 @@ class SeedFinderWindow(QDialog):
         super().__init__(parent)
 
         self.console_window = None
-        self.worker_thread = None
-        self.results_1 = None
-        self.results_2 = None
-        self.results_gen = None
-        self.tried_first_order = False
+        self.fixed_seed_results = [None, None]
+        self.fixed_seed_threads = []
+        self.order_threads = []
+        self.pending_orders = 0
+        self.group_seed_found = False
+        self.matrices_thread = None
 
         self.setWindowTitle(
             "Seed Finder "
             f"{SPAWNER_NAMES_LA.get(np.uint64(spawner.spawner_id), '')} - "
             f"{ENCOUNTER_TABLE_NAMES_LA.get(np.uint64(spawner.encounter_table_id), '')}"
         )
+        self.device_combobox = QComboBox()
+        for platform_index, device_index, device in list_devices():
+            self.device_combobox.addItem(
+                device_label(device), (platform_index, device_index)
+            )
+        if self.device_combobox.count():
+            # select by index, devices can share a label
+            platform_index, device_index, _ = selected_device()
+            self.device_combobox.setCurrentIndex(
+                next(
+                    (
+                        i
+                        for i in range(self.device_combobox.count())
+                        if self.device_combobox.itemData(i)
+                        == (platform_index, device_index)
+                    ),
+                    0,
+                )
+            )
+        self.device_combobox.currentIndexChanged.connect(self.device_changed)
+        self.multi_device_checkbox = QCheckBox("Use All Devices For Fixed Seeds")
+        self.multi_device_checkbox.setEnabled(self.device_combobox.count() > 1)
         self.fixed_seed_steps = LogSpinBox(2, 0, 10, "Fixed Seed Steps")
         self.generator_seed_steps = LogSpinBox(2, 0, 8, "Generator Seed Steps")
         self.generator_seed_steps.spin_box.setValue(128)
+        self.auto_steps_checkbox = QCheckBox("Auto Tune Steps")
+        self.auto_steps_checkbox.setToolTip(
+            "Size launches from their measured time instead of a fixed step count"
+        )
+        self.auto_steps_checkbox.toggled.connect(self.auto_steps_toggled)
+        self.auto_steps_checkbox.setChecked(True)
+        self.profile_checkbox = QCheckBox("Profile")
+        self.profile_checkbox.setToolTip(
+            "Time every kernel launch, transfer, build and verification"
+        )
         # TODO: this is a little hacky
         # these two encounter tables are the only two in the game with forced gender encounters
         # the only forced gendered mons in the tables are basculin, and they are always forced
@@ -108,135 +179,304 @@ class SeedFinderWindow(QDialog):
         )
         self.compute_seed_button = QPushButton("Compute Group Seed")
         self.compute_seed_button.clicked.connect(self.compute_seed)
+        self.resume_button = QPushButton("Resume")
+        self.resume_button.setToolTip(
+            "Continue an interrupted search from its last checkpoint"
+        )
+        self.resume_button.clicked.connect(lambda: self.compute_seed(resume=True))
+        self.estimate_label = QLabel()
+        self.estimate_label.setWordWrap(True)
+        self.pokemon_1.changed.connect(self.update_estimate)
+        self.pokemon_2.changed.connect(self.update_estimate)
 
         self.sub_layout.addWidget(self.pokemon_1)
         self.sub_layout.addWidget(self.pokemon_2)
+        self.main_layout.addWidget(self.device_combobox)
+        self.main_layout.addWidget(self.multi_device_checkbox)
+        self.main_layout.addWidget(self.auto_steps_checkbox)
+        self.main_layout.addWidget(self.profile_checkbox)
         self.main_layout.addWidget(self.fixed_seed_steps)
         self.main_layout.addWidget(self.generator_seed_steps)
         self.main_layout.addWidget(self.sub_widget)
+        self.main_layout.addWidget(self.estimate_label)
         self.main_layout.addWidget(self.compute_seed_button)
+        self.main_layout.addWidget(self.resume_button)
+        self.update_estimate()
+
+    def device_changed(self, index: int) -> None:
+        """Callback for when the OpenCL device combobox changes"""
+        if index == -1:
+            return
+        select_device(*self.device_combobox.currentData())
+        self.update_estimate()
 
-    def compute_seed(self) -> None:
-        """Callback for when the compute group seed button is clicked"""
+    def pokemon_estimate(self, pokemon: PokemonInfoWidget) -> PokemonEstimate:
+        """Values of a pokemon that determine its fixed seed search"""
+        species_form = pokemon.species_combobox.currentData()
+        personal_info = get_personal_info(*species_form)
+        return PokemonEstimate(
+            pokemon.shiny_rolls_combobox.currentData(),
+            iv_combinations(
+                [iv_widget.value() for iv_widget in pokemon.min_iv_widgets],
+                [iv_widget.value() for iv_widget in pokemon.max_iv_widgets],
+            ),
+            personal_info.ability_1 != personal_info.ability_2,
+            value_mask(pokemon.ability_combobox.currentData(), ANY_ABILITY),
+            value_mask(pokemon.gender_combobox.currentData(), ANY_GENDER),
+            value_mask(pokemon.nature_combobox.currentData(), ANY_NATURE),
+            get_gender_ratio(species_form, self.basculin_gender),
+            possible_sizes_bitset(*pokemon.measurements.get_value()),
+        )
+
+    def update_estimate(self) -> None:
+        """Show the expected results, memory and time of a run with the current inputs"""
+        if not hasattr(self, "estimate_label"):
+            # inputs change while the window is still being built
+            return
+        try:
+            pokemon = [
+                self.pokemon_estimate(self.pokemon_1),
+                self.pokemon_estimate(self.pokemon_2),
+            ]
+        except TypeError:
+            # a combobox without a selection
+            self.estimate_label.setText("")
+            return
+        missing_matrices = {
+            pokemon_.shiny_rolls
+            for pokemon_ in pokemon
+            if cached_fixed_seed_matrices(pokemon_.shiny_rolls) is None
+        }
+        if missing_matrices:
+            # computing matrices takes seconds, so it must not block the window
+            self.estimate_label.setText("Computing fixed seed matrices....")
+            if self.matrices_thread is None or not self.matrices_thread.isRunning():
+                self.matrices_thread = ComputeMatricesThread(missing_matrices)
+                self.matrices_thread.finished.connect(self.update_estimate)
+                self.matrices_thread.start()
+            return
+        device_name = (
+            self.device_combobox.currentText()
+            if self.device_combobox.count()
+            else "CPU"
+        )
+        estimate = estimate_run(pokemon, 2 if self.is_variable else 1, device_name)
+        self.estimate_label.setText(
+            f"Expected fixed seeds: {estimate.fixed_seeds[0]:,.0f} / "
+            f"{estimate.fixed_seeds[1]:,.0f}, "
+            f"generator seeds: {estimate.generator_seeds:,.0f}, "
+            f"device memory: {estimate.memory / (1024 * 1024):,.1f} MiB, "
+            f"time: ~{format_duration(estimate.seconds)}"
+            + ("" if estimate.calibrated else " (uncalibrated)")
+        )
+
+    def auto_steps_toggled(self, checked: bool) -> None:
+        """Callback for when the auto tune steps checkbox is toggled"""
+        self.fixed_seed_steps.setEnabled(not checked)
+        self.generator_seed_steps.setEnabled(not checked)
+
+    def steps(self, log_spin_box: LogSpinBox) -> int:
+        """Step count of a stage, None to auto tune"""
+        if self.auto_steps_checkbox.isChecked():
+            return None
+        return log_spin_box.spin_box.value()
+
+    def threads(self) -> list:
+        """Every thread of the current search"""
+        return self.fixed_seed_threads + self.order_threads
+
+    def cancel_search(self) -> None:
+        """Interrupt every thread of the current search"""
+        self.search_failed = True
+        for thread in self.threads():
+            thread.requestInterruption()
+
+    def closeEvent(self, event):
+        self.cancel_search()
+        # threads must not outlive the window that owns them
+        for thread in self.threads():
+            thread.wait()
+        if self.matrices_thread is not None:
+            self.matrices_thread.wait()
+        if self.console_window is not None:
+            self.console_window.close()
+        event.accept()
+
+    def compute_seed(self, resume: bool = False) -> None:
+        """Callback for when the compute group seed or resume button is clicked"""
+        if any(thread.isRunning() for thread in self.threads()):
+            # only one search runs at a time
+            self.console_window.show()
+            self.console_window.log("Cancel the running search first.")
+            return
         self.console_window = ConsoleWindow()
+        self.console_window.cancelled.connect(self.cancel_search)
         self.console_window.show()
-        self.results_1 = None
-        self.results_2 = None
-        self.results_gen = None
-        self.tried_first_order = False
-
-        def compute_fixed_seeds_1():
-            self.worker_thread = ComputeFixedSeedsThread(
-                self.fixed_seed_steps.spin_box.value(),
-                self.pokemon_1.species_combobox.currentData(),
+        profiler = Profiler(self.profile_checkbox.isChecked())
+        # fixed seeds of pokemon 1 and 2, None until their search succeeds
+        self.fixed_seed_results = [None, None]
+        # callbacks waiting for the fixed seeds of pokemon 1 and 2
+        fixed_seed_waiters = [[], []]
+        self.fixed_seed_threads = []
+        self.order_threads = []
+        self.pending_orders = 2 if self.is_variable else 1
+        self.group_seed_found = False
+        self.search_failed = False
+
+        def compute_fixed_seeds(pokemon_index: int, pokemon: PokemonInfoWidget):
+            label = f"Pokemon {pokemon_index + 1}"
+            worker_thread = ComputeFixedSeedsThread(
+                self.steps(self.fixed_seed_steps),
+                pokemon.species_combobox.currentData(),
                 self.basculin_gender,
-                self.pokemon_1.shiny_rolls_combobox.currentData(),
-                tuple(iv_widget.value() for iv_widget in self.pokemon_1.iv_widgets),
-                self.pokemon_1.ability_combobox.currentData(),
-                self.pokemon_1.nature_combobox.currentData(),
-                self.pokemon_1.gender_combobox.currentData(),
-                *self.pokemon_1.measurements.get_value(),
+                pokemon.shiny_rolls_combobox.currentData(),
+                tuple(iv_widget.value() for iv_widget in pokemon.min_iv_widgets),
+                tuple(iv_widget.value() for iv_widget in pokemon.max_iv_widgets),
+                pokemon.ability_combobox.currentData(),
+                pokemon.nature_combobox.currentData(),
+                pokemon.gender_combobox.currentData(),
+                *pokemon.measurements.get_value(),
+                multi_device=self.multi_device_checkbox.isChecked(),
+                resume=resume,
+                profiler=profiler.stage(f"{label} fixed seeds"),
+            )
+            self.fixed_seed_threads.append(worker_thread)
+            worker_thread.log.connect(
+                lambda line: self.console_window.log(f"[{label}] {line}")
             )
-            self.worker_thread.log.connect(self.console_window.log)
-            self.worker_thread.finished.connect(compute_fixed_seeds_2)
 
             def save_results(results):
-                self.results_1 = results
-
-            self.worker_thread.results.connect(save_results)
+                self.fixed_seed_results[pokemon_index] = results
+                waiters = fixed_seed_waiters[pokemon_index]
+                while waiters:
+                    waiters.pop(0)()
 
-            self.worker_thread.init_progress_bar.connect(
-                self.console_window.progress_bar.setMaximum
-            )
-            self.worker_thread.progress.connect(
-                self.console_window.progress_bar.setValue
+            worker_thread.results.connect(save_results)
+            worker_thread.finished.connect(
+                lambda: on_fixed_seeds_finished(pokemon_index)
             )
-            self.console_window.log("Starting fixed seed search for Pokemon 1.")
-            self.worker_thread.start()
+            # both searches run at once, only pokemon 1 drives the shared progress bar
+            if pokemon_index == 0:
+                worker_thread.init_progress_bar.connect(
+                    self.console_window.progress_bar.setMaximum
+                )
+                worker_thread.progress.connect(
+                    self.console_window.progress_bar.setValue
+                )
+            self.console_window.log(f"Starting fixed seed search for {label}.")
+            worker_thread.start()
 
-        def compute_fixed_seeds_2():
-            self.console_window.log("Fixed seed search ended.")
-            if self.results_1 is None:
+        def on_fixed_seeds_finished(pokemon_index: int):
+            self.console_window.log(
+                f"Fixed seed search ended for Pokemon {pokemon_index + 1}."
+            )
+            if self.search_failed:
+                return
+            if self.fixed_seed_results[pokemon_index] is None:
                 self.console_window.log("Fixed seed search unsuccessful.")
+                self.cancel_search()
+                search_ended()
                 return
-            self.worker_thread = ComputeFixedSeedsThread(
-                self.fixed_seed_steps.spin_box.value(),
-                self.pokemon_2.species_combobox.currentData(),
-                self.basculin_gender,
-                self.pokemon_2.shiny_rolls_combobox.currentData(),
-                tuple(iv_widget.value() for iv_widget in self.pokemon_2.iv_widgets),
-                self.pokemon_2.ability_combobox.currentData(),
-                self.pokemon_2.nature_combobox.currentData(),
-                self.pokemon_2.gender_combobox.currentData(),
-                *self.pokemon_2.measurements.get_value(),
-            )
-            self.worker_thread.log.connect(self.console_window.log)
-            self.worker_thread.finished.connect(compute_generator_seed)
+            # the order starting with this pokemon only needs its fixed seeds
+            # to begin the generator seed search
+            if pokemon_index == 0 or self.is_variable:
+                compute_order(pokemon_index)
 
-            def save_results(results):
-                self.results_2 = results
+        def compute_order(order_index: int):
+            label = f"[Order {order_index + 1}] " if self.is_variable else ""
 
-            self.worker_thread.results.connect(save_results)
+            def log(line):
+                self.console_window.log(label + line)
 
-            self.worker_thread.init_progress_bar.connect(
-                self.console_window.progress_bar.setMaximum
-            )
-            self.worker_thread.progress.connect(
-                self.console_window.progress_bar.setValue
+            generator_thread = ComputeGeneratorSeedsThread(
+                self.steps(self.generator_seed_steps),
+                self.fixed_seed_results[order_index],
+                resume=resume,
+                profiler=profiler.stage(f"{label}generator seeds"),
             )
-            self.console_window.log("Starting fixed seed search for Pokemon 2.")
-            self.worker_thread.start()
-
-        def compute_generator_seed():
-            if not self.tried_first_order:
-                self.console_window.log("Fixed seed search ended.")
-            if self.results_2 is None:
-                self.console_window.log("Fixed seed search unsuccessful.")
-                return
-            self.tried_first_order = True
-            self.worker_thread = ComputeGeneratorSeedsThread(
-                self.generator_seed_steps.spin_box.value(),
-                self.results_1,
-            )
-            self.worker_thread.log.connect(self.console_window.log)
-            self.worker_thread.finished.connect(compute_group_seed)
+            self.order_threads.append(generator_thread)
+            generator_thread.log.connect(log)
+            results_gen = None
 
             def save_results(results):
-                self.results_gen = results
+                nonlocal results_gen
+                results_gen = results
+                log("Generator seed search ended.")
+                compute_group_seed()
 
-            self.worker_thread.results.connect(save_results)
+            def compute_group_seed():
+                if self.group_seed_found or self.search_failed:
+                    on_group_seed_result(False, None)
+                    return
+                fixed_seeds_2 = self.fixed_seed_results[1 - order_index]
+                if fixed_seeds_2 is None:
+                    # the other pokemon's fixed seeds have not been saved yet,
+                    # saving them runs this again (both happen on this thread)
+                    log("Waiting for the other fixed seed search....")
+                    fixed_seed_waiters[1 - order_index].append(compute_group_seed)
+                    return
+                group_thread = ComputeGroupSeedThread(
+                    self.fixed_seed_results[order_index],
+                    fixed_seeds_2,
+                    results_gen,
+                    self.is_multi_spawner,
+                    profiler=profiler.stage(f"{label}group seed"),
+                )
+                self.order_threads.append(group_thread)
+                group_thread.log.connect(log)
+                group_thread.valid_result.connect(
+                    lambda valid: on_group_seed_result(valid, group_thread)
+                )
+                log("Starting group seed search.")
+                group_thread.start()
 
-            self.worker_thread.init_progress_bar.connect(
-                self.console_window.progress_bar.setMaximum
-            )
-            self.worker_thread.progress.connect(
-                self.console_window.progress_bar.setValue
-            )
-            self.console_window.log("Starting generator seed search.")
-            self.worker_thread.start()
+            def on_generator_seed_finished():
+                # cancelled or failed generator seed searches emit no results
+                if results_gen is None:
+                    log("Generator seed search unsuccessful.")
+                    on_group_seed_result(False, None)
 
-        def compute_group_seed():
-            self.console_window.log("Generator seed search ended.")
-            if self.results_gen is None:
-                self.console_window.log("Generator seed search unsuccessful")
-                return
-            self.worker_thread = ComputeGroupSeedThread(
-                self.results_2, self.results_gen, self.is_multi_spawner
-            )
-            self.worker_thread.log.connect(self.console_window.log)
-            self.worker_thread.valid_result.connect(on_group_seed_result)
-            self.console_window.log("Starting group seed search.")
-            self.worker_thread.start()
+            generator_thread.results.connect(save_results)
+            generator_thread.finished.connect(on_generator_seed_finished)
+            # only the first order drives the shared progress bar
+            if order_index == 0:
+                generator_thread.init_progress_bar.connect(
+                    self.console_window.progress_bar.setMaximum
+                )
+                generator_thread.progress.connect(
+                    self.console_window.progress_bar.setValue
+                )
+            log("Starting generator seed search.")
+            generator_thread.start()
 
-        def on_group_seed_result(valid: bool):
-            if not valid:
+        def on_group_seed_result(valid: bool, source_thread):
+            self.pending_orders -= 1
+            if self.search_failed:
+                return
+            if valid and not self.group_seed_found:
+                self.group_seed_found = True
+                # the first valid group seed cancels the search of the other order
+                for thread in self.order_threads:
+                    if thread is not source_thread:
+                        thread.requestInterruption()
+                self.console_window.log("Group seed search ended.")
+                search_ended()
+            elif self.pending_orders == 0 and not self.group_seed_found:
                 self.console_window.log("Group seed search unsuccessful.")
-                if self.is_variable and self.tried_first_order:
-                    self.console_window.log("Testing other order.")
-                    temp = self.results_1
-                    self.results_1 = self.results_2
-                    self.results_2 = temp
-                    compute_generator_seed()
-            self.console_window.log("Group seed search ended.")
-
-        compute_fixed_seeds_1()
+                self.console_window.log("Group seed search ended.")
+                search_ended()
+
+        def search_ended():
+            self.console_window.search_ended()
+            if not profiler.enabled:
+                return
+            self.console_window.log("Profile:")
+            for line in profiler.summary():
+                self.console_window.log(f"  {line}")
+            try:
+                self.console_window.log(f"Trace written to {profiler.write_trace()}")
+            except OSError as error:
+                self.console_window.log(f"Trace could not be written: {error}")
+
+        compute_fixed_seeds(0, self.pokemon_1)
+        compute_fixed_seeds(1, self.pokemon_2)
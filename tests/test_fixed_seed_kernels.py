@@ -0,0 +1,368 @@
+"""Tests of the fixed seed search kernels against a planted fixed seed"""
+
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+cl = pytest.importorskip("pyopencl")
+
+SHADER_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "pla_reverse_gui", "shaders"
+)
+UPSTREAM_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "pla_reverse_gui", "pla_reverse_main"
+)
+MASK_64 = (1 << 64) - 1
+XOROSHIRO_CONST = 0x82A2B175229D6A5B
+SHINY_ROLLS = 1
+# gender ratio of a pokemon with both genders
+GENDER_RATIO = 127
+
+
+class Xoroshiro:
+    """Reference Xoroshiro128+ with PLA's rejection sampling"""
+
+    def __init__(self, seed: int) -> None:
+        self.s0 = seed
+        self.s1 = XOROSHIRO_CONST
+
+    @staticmethod
+    def rotl(value: int, count: int) -> int:
+        """Rotate a 64 bit value left"""
+        return ((value << count) | (value >> (64 - count))) & MASK_64
+
+    def next(self) -> int:
+        """Next 64 bit rand"""
+        s0, s1 = self.s0, self.s1
+        result = (s0 + s1) & MASK_64
+        s1 ^= s0
+        self.s0 = self.rotl(s0, 24) ^ s1 ^ ((s1 << 16) & MASK_64)
+        self.s1 = self.rotl(s1, 37)
+        return result
+
+    def rand(self, maximum: int) -> int:
+        """Rand in [0, maximum) by rejection sampling"""
+        mask = (1 << (maximum - 1).bit_length()) - 1
+        while True:
+            result = self.next() & mask
+            if result < maximum:
+                return result
+
+
+def generate(seed: int) -> dict:
+    """Regenerate the values a fixed seed gives a pokemon"""
+    rng = Xoroshiro(seed)
+    for _ in range(2 + SHINY_ROLLS):
+        rng.next()
+    ivs = [rng.next() & 31 for _ in range(6)]
+    ability = rng.next() & 1
+    gender = int(rng.rand(253) + 1 < GENDER_RATIO)
+    nature = rng.rand(25)
+    height = rng.rand(0x81) + rng.rand(0x80)
+    weight = rng.rand(0x81) + rng.rand(0x80)
+    return {
+        "ivs": ivs,
+        "ability": ability,
+        "gender": gender,
+        "nature": nature,
+        "size_index": (height << 8) | weight,
+    }
+
+
+def iv_target(seed: int) -> int:
+    """60 bit target vector of a seed, the low 5 bits of s0 and s1 of every iv rand"""
+    rng = Xoroshiro(seed)
+    for _ in range(2 + SHINY_ROLLS):
+        rng.next()
+    target = 0
+    for i in range(6):
+        target |= ((rng.s0 & 31) | ((rng.s1 & 31) << 5)) << (10 * i)
+        rng.next()
+    return target
+
+
+def fixed_seed_matrices() -> tuple[np.ndarray, np.ndarray, int]:
+    """
+    SEED_MAT, NULL_SPACE and IV_CONST of the affine map from seeds to target vectors,
+    computed independently of pla_reverse by gaussian elimination
+    """
+    iv_const = iv_target(0)
+    # (image, preimage) pairs reduced so that every pivot bit is unique to its image
+    basis: dict[int, tuple[int, int]] = {}
+    null_space = []
+    for bit in range(64):
+        image, preimage = iv_target(1 << bit) ^ iv_const, 1 << bit
+        for pivot, (basis_image, basis_preimage) in basis.items():
+            if (image >> pivot) & 1:
+                image ^= basis_image
+                preimage ^= basis_preimage
+        if image == 0:
+            null_space.append(preimage)
+            continue
+        pivot = image.bit_length() - 1
+        for other_pivot, (basis_image, basis_preimage) in list(basis.items()):
+            if (basis_image >> pivot) & 1:
+                basis[other_pivot] = (basis_image ^ image, basis_preimage ^ preimage)
+        basis[pivot] = (image, preimage)
+    seed_mat = [basis[bit][1] if bit in basis else 0 for bit in range(60)]
+    return (
+        np.array(seed_mat, np.uint64),
+        np.array(null_space, np.uint64),
+        iv_const,
+    )
+
+
+def params(values: dict) -> np.ndarray:
+    """Runtime params of a search for a pokemon"""
+    return np.array(
+        (
+            SHINY_ROLLS,
+            True,
+            1 << values["ability"],
+            GENDER_RATIO,
+            1 << values["gender"],
+            1 << values["nature"],
+            *values["ivs"],
+            *values["ivs"],
+        ),
+        np.uint32,
+    )
+
+
+def sizes_bitset(size_index: int) -> np.ndarray:
+    """Bitset of a single size"""
+    sizes = np.zeros(1024, np.uint64)
+    sizes[size_index >> 6] = np.uint64(1 << (size_index & 63))
+    return sizes
+
+
+def load_source(name: str) -> str:
+    """Load a shader source from the GUI's shader directory"""
+    with open(os.path.join(SHADER_DIRECTORY, f"{name}.cl"), encoding="utf-8") as file:
+        return file.read()
+
+
+@pytest.fixture(scope="module")
+def context_queue():
+    """Context and queue of the first available OpenCL device"""
+    try:
+        devices = [
+            device
+            for platform in cl.get_platforms()
+            for device in platform.get_devices()
+        ]
+    except cl.Error:
+        devices = []
+    if not devices:
+        pytest.skip("No OpenCL devices available")
+    context = cl.Context(devices[:1])
+    return context, cl.CommandQueue(context)
+
+
+@pytest.fixture(scope="module")
+def params_program(context_queue):
+    """Built fixed_seed_params_shader"""
+    context, _ = context_queue
+    source = "\n".join(
+        (load_source("xoroshiro"), load_source("fixed_seed_params_shader"))
+    )
+    return cl.Program(context, source).build()
+
+
+@pytest.fixture(scope="module")
+def matrices():
+    """Fixed seed matrices of SHINY_ROLLS"""
+    return fixed_seed_matrices()
+
+
+@pytest.fixture(scope="module")
+def planted_seed():
+    """A random fixed seed and the values it gives its pokemon"""
+    seed = random.Random(0x5EED).getrandbits(64)
+    return seed, generate(seed)
+
+
+def planted_slice(seed: int) -> tuple[int, int, int]:
+    """Work item (slice, y, z) whose target vector is the planted seed's"""
+    target = iv_target(seed)
+    guesses = [
+        ((target >> (10 * i)) & 31) | (((target >> (10 * (i + 1))) & 31) << 5)
+        for i in (0, 2, 4)
+    ]
+    return tuple(guesses)
+
+
+def run_search(
+    context_queue,
+    kernel: cl.Kernel,
+    global_size: tuple,
+    local_size: tuple,
+    offset: int,
+    kernel_inputs: tuple,
+    local_args: tuple = (),
+    capacity: int = 1 << 22,
+) -> np.ndarray:
+    """Run a fixed seed search kernel and return its sorted results"""
+    context, queue = context_queue
+    flags = cl.mem_flags
+    count = np.zeros(1, np.uint32)
+    count_buffer = cl.Buffer(
+        context, flags.READ_WRITE | flags.COPY_HOST_PTR, hostbuf=count
+    )
+    results_buffer = cl.Buffer(context, flags.READ_WRITE, capacity * 8)
+    kernel_args = [
+        cl.Buffer(context, flags.READ_ONLY | flags.COPY_HOST_PTR, hostbuf=kernel_input)
+        if isinstance(kernel_input, np.ndarray)
+        else kernel_input
+        for kernel_input in kernel_inputs
+    ]
+    kernel(
+        queue,
+        global_size,
+        local_size,
+        count_buffer,
+        results_buffer,
+        np.uint32(capacity),
+        *kernel_args,
+        np.uint32(offset),
+        *local_args,
+    )
+    cl.enqueue_copy(queue, count, count_buffer)
+    assert count[0] <= capacity
+    results = np.empty(count[0], np.uint64)
+    if count[0]:
+        cl.enqueue_copy(queue, results, results_buffer)
+    return np.sort(results)
+
+
+def search_inputs(matrices, search_params: np.ndarray, sizes: np.ndarray) -> tuple:
+    """Kernel inputs of find_fixed_seeds_split between capacity and offset"""
+    seed_mat, null_space, iv_const = matrices
+    return (
+        seed_mat,
+        np.uint32(len(seed_mat)),
+        null_space,
+        np.uint32(len(null_space)),
+        np.uint64(iv_const),
+        search_params,
+        sizes,
+    )
+
+
+def test_matrices_solve_targets(matrices):
+    """SEED_MAT maps a seed's target vector back into the seed's nullspace coset"""
+    seed_mat, null_space, iv_const = matrices
+    rng = random.Random(1)
+    for _ in range(64):
+        seed = rng.getrandbits(64)
+        solved = 0
+        target = iv_target(seed) ^ iv_const
+        for bit, row in enumerate(seed_mat):
+            if (target >> bit) & 1:
+                solved ^= int(row)
+        assert iv_target(solved) == iv_target(seed)
+    for row in null_space:
+        assert iv_target(int(row)) == iv_const
+
+
+def test_params_kernel_finds_planted_seed(
+    context_queue, params_program, matrices, planted_seed
+):
+    """find_fixed_seeds_split finds the planted seed and only matching seeds"""
+    seed, values = planted_seed
+    slice_index, y, z = planted_slice(seed)
+    results = run_search(
+        context_queue,
+        cl.Kernel(params_program, "find_fixed_seeds_split"),
+        (1, 32 ** 2, 32 ** 2),
+        None,
+        slice_index,
+        search_inputs(matrices, params(values), sizes_bitset(values["size_index"])),
+    )
+    assert seed in results.tolist()
+    assert len(np.unique(results)) == len(results)
+    for result in results.tolist():
+        assert generate(result) == values
+
+
+def test_params_kernel_matches_upstream(context_queue, params_program, planted_seed):
+    """find_fixed_seeds_split matches upstream's fixed_seed_shader on the same slice"""
+    if not os.path.isdir(os.path.join(UPSTREAM_DIRECTORY, "pla_reverse")):
+        pytest.skip("pla_reverse submodule is not checked out")
+    sys.path.insert(0, UPSTREAM_DIRECTORY)
+    try:
+        # pylint: disable=import-outside-toplevel
+        from pla_reverse import matrix, shaders, size
+    finally:
+        sys.path.remove(UPSTREAM_DIRECTORY)
+    seed, values = planted_seed
+    iv_matrix = matrix.iv_matrix(SHINY_ROLLS)
+    seed_mat = np.array(
+        [matrix.vec_to_int(row) for row in matrix.generalized_inverse(iv_matrix)],
+        np.uint64,
+    )
+    null_space = np.array(
+        [matrix.vec_to_int(row) for row in matrix.nullspace(iv_matrix)], np.uint64
+    )
+    iv_const = matrix.vec_to_int(matrix.iv_const(SHINY_ROLLS))
+    sizes = sizes_bitset(values["size_index"])
+    sizes_set = {
+        (size_index >> 8, size_index & 0xFF)
+        for size_index in range(256 * 256)
+        if (int(sizes[size_index >> 6]) >> (size_index & 63)) & 1
+    }
+    upstream_program = cl.Program(
+        context_queue[0],
+        shaders.build_shader_code(
+            "fixed_seed_shader",
+            {
+                "SHINY_ROLLS": SHINY_ROLLS,
+                "IV_CONST": iv_const,
+                "SEED_MAT": ",".join(str(row) for row in seed_mat),
+                "NULL_SPACE": ",".join(str(row) for row in null_space),
+                "IVS": ",".join(str(iv) for iv in values["ivs"]),
+                "TWO_ABILITIES": "true",
+                "ABILITY": values["ability"],
+                "GENDER_RATIO": GENDER_RATIO,
+                "GENDER": values["gender"],
+                "NATURE": values["nature"],
+                "SIZES": ",".join(
+                    str(row) for row in size.build_sizes_table(sizes_set)
+                ),
+            },
+        ),
+    ).build()
+    slice_index, _, _ = planted_slice(seed)
+    context, queue = context_queue
+    flags = cl.mem_flags
+    capacity = 1 << 16
+    count = np.zeros(1, np.uint32)
+    count_buffer = cl.Buffer(
+        context, flags.READ_WRITE | flags.COPY_HOST_PTR, hostbuf=count
+    )
+    results_buffer = cl.Buffer(context, flags.READ_WRITE, capacity * 8)
+    cl.Kernel(upstream_program, "find_fixed_seeds_split")(
+        queue,
+        (1, 32 ** 2, 32 ** 2),
+        None,
+        count_buffer,
+        results_buffer,
+        np.uint32(slice_index),
+    )
+    cl.enqueue_copy(queue, count, count_buffer)
+    upstream_results = np.empty(count[0], np.uint64)
+    if count[0]:
+        cl.enqueue_copy(queue, upstream_results, results_buffer)
+    results = run_search(
+        context_queue,
+        cl.Kernel(params_program, "find_fixed_seeds_split"),
+        (1, 32 ** 2, 32 ** 2),
+        None,
+        slice_index,
+        search_inputs((seed_mat, null_space, iv_const), params(values), sizes),
+    )
+    assert seed in results.tolist()
+    np.testing.assert_array_equal(results, np.sort(upstream_results))
@@ -0,0 +1,120 @@
+"""Tests of the wrappers of the upstream generator seed kernel"""
+
+import os
+
+import numpy as np
+import pytest
+
+cl = pytest.importorskip("pyopencl")
+
+SHADER_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "pla_reverse_gui", "shaders"
+)
+# stands in for the upstream kernel, appending results without a capacity check
+UPSTREAM_STUB = """
+kernel void find_generator_seeds(
+    global ulong *count,
+    global ulong *results,
+    global ulong *slices,
+    global ulong *seeds,
+    uint seed_index
+) {
+    ulong id = get_global_id(0);
+    if (id % 4 == 0) {
+        results[atom_inc(count)] = seeds[seed_index] ^ id;
+    }
+}
+"""
+# untouched slots written after the result buffer
+GUARD_SLOTS = 16
+GUARD = np.uint64(0xDEADBEEFDEADBEEF)
+
+
+def load_source(name: str) -> str:
+    """Load a shader of the package"""
+    with open(
+        os.path.join(SHADER_DIRECTORY, f"{name}.cl"), "r", encoding="utf-8"
+    ) as shader_file:
+        return shader_file.read()
+
+
+@pytest.fixture(scope="module")
+def context_queue():
+    """Context and queue of the first device with 64 bit atomics"""
+    try:
+        devices = [
+            device
+            for platform in cl.get_platforms()
+            for device in platform.get_devices()
+            if "cl_khr_int64_base_atomics" in device.extensions
+        ]
+    except cl.Error:
+        devices = []
+    if not devices:
+        pytest.skip("No OpenCL devices with 64 bit atomics available")
+    context = cl.Context(devices[:1])
+    return context, cl.CommandQueue(context)
+
+
+@pytest.fixture(scope="module")
+def bounded_program(context_queue):
+    """Stub upstream kernel built with the bounds prologue and batched entry point"""
+    context, _ = context_queue
+    source = "\n".join(
+        (
+            load_source("generator_seed_bounds_shader"),
+            UPSTREAM_STUB,
+            load_source("generator_seed_batch_shader"),
+        )
+    )
+    return cl.Program(context, source).build()
+
+
+def run_batched(context_queue, program, capacity: int, batch_size: int):
+    """Run the batched kernel, returning (count, results, guard slots)"""
+    context, queue = context_queue
+    flags = cl.mem_flags
+    count = np.array((0, capacity), np.uint64)
+    count_buffer = cl.Buffer(
+        context, flags.READ_WRITE | flags.COPY_HOST_PTR, hostbuf=count
+    )
+    # capacity slots, the overflow slot and guards that must not be written
+    results = np.full(capacity + 1 + GUARD_SLOTS, GUARD, np.uint64)
+    results_buffer = cl.Buffer(
+        context, flags.READ_WRITE | flags.COPY_HOST_PTR, hostbuf=results
+    )
+    slices = np.zeros(256, np.uint64)
+    seeds = np.arange(batch_size, dtype=np.uint64) << np.uint64(32)
+    cl.Kernel(program, "find_generator_seeds_batched")(
+        queue,
+        (1024,),
+        None,
+        count_buffer,
+        results_buffer,
+        cl.Buffer(context, flags.READ_ONLY | flags.COPY_HOST_PTR, hostbuf=slices),
+        cl.Buffer(context, flags.READ_ONLY | flags.COPY_HOST_PTR, hostbuf=seeds),
+        np.uint32(0),
+        np.uint32(batch_size),
+    )
+    cl.enqueue_copy(queue, count, count_buffer)
+    cl.enqueue_copy(queue, results, results_buffer)
+    return int(count[0]), results[:capacity], results[capacity + 1 :]
+
+
+def test_bounded_results_fit(context_queue, bounded_program):
+    """Results that fit the capacity are all written"""
+    count, results, guard = run_batched(context_queue, bounded_program, 1024, 2)
+    assert count == 2 * 256
+    expected = np.array(
+        [(seed << 32) ^ item for seed in range(2) for item in range(0, 1024, 4)],
+        np.uint64,
+    )
+    np.testing.assert_array_equal(np.sort(results[:count]), np.sort(expected))
+    assert (guard == GUARD).all()
+
+
+def test_bounded_results_overflow(context_queue, bounded_program):
+    """Results past the capacity are counted but never written out of bounds"""
+    count, _, guard = run_batched(context_queue, bounded_program, 64, 4)
+    assert count == 4 * 256
+    assert (guard == GUARD).all()
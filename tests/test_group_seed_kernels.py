@@ -0,0 +1,278 @@
+"""Tests of the group seed candidate kernel against planted group seeds and upstream"""
+
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+cl = pytest.importorskip("pyopencl")
+
+SHADER_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "pla_reverse_gui", "shaders"
+)
+UPSTREAM_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "pla_reverse_gui", "pla_reverse_main"
+)
+MASK_64 = (1 << 64) - 1
+XOROSHIRO_CONST = 0x82A2B175229D6A5B
+# unrelated generator and fixed seeds mixed in with the planted ones
+DECOYS = 4096
+
+
+class Xoroshiro:
+    """Xoroshiro128+ as used by PLA"""
+
+    def __init__(self, seed: int) -> None:
+        self.s0 = seed
+        self.s1 = XOROSHIRO_CONST
+
+    def next(self) -> int:
+        """Next 64 bit output"""
+        s0, s1 = self.s0, self.s1
+        result = (s0 + s1) & MASK_64
+        s1 ^= s0
+        self.s0 = (
+            ((s0 << 24) | (s0 >> 40)) ^ s1 ^ ((s1 << 16) & MASK_64)
+        ) & MASK_64
+        self.s1 = ((s1 << 37) | (s1 >> 27)) & MASK_64
+        return result
+
+
+def spawn(group_seed: int, is_multi_spawner: bool) -> tuple[int, int, int, int]:
+    """
+    (generator seed, fixed seed) of the first two pokemon of a group seed,
+    following the spawn loop of the path tracker window
+    """
+    group_rng = Xoroshiro(group_seed)
+    seeds = []
+    for _ in range(2):
+        generator_seed = group_rng.next()
+        # alpha rand
+        group_rng.next()
+        generator_rng = Xoroshiro(generator_seed)
+        # slot rand
+        generator_rng.next()
+        seeds += (generator_seed, generator_rng.next())
+        if not is_multi_spawner:
+            # single spawners spawn one pokemon per advance and then reseed
+            group_rng = Xoroshiro(group_rng.next())
+    return tuple(seeds)
+
+
+def load_source(name: str) -> str:
+    """Load a shader of the package"""
+    with open(
+        os.path.join(SHADER_DIRECTORY, f"{name}.cl"), "r", encoding="utf-8"
+    ) as shader_file:
+        return shader_file.read()
+
+
+@pytest.fixture(scope="module")
+def context_queue():
+    """Context and queue of the first available OpenCL device"""
+    try:
+        devices = [
+            device
+            for platform in cl.get_platforms()
+            for device in platform.get_devices()
+        ]
+    except cl.Error:
+        devices = []
+    if not devices:
+        pytest.skip("No OpenCL devices available")
+    context = cl.Context(devices[:1])
+    return context, cl.CommandQueue(context)
+
+
+def upload(context, array: np.ndarray) -> cl.Buffer:
+    """Read only device copy of array"""
+    flags = cl.mem_flags
+    return cl.Buffer(context, flags.READ_ONLY | flags.COPY_HOST_PTR, hostbuf=array)
+
+
+@pytest.fixture(scope="module")
+def candidates_program(context_queue):
+    """Built group_seed_candidates_shader"""
+    context, _ = context_queue
+    source = "\n".join(
+        (load_source("xoroshiro"), load_source("group_seed_candidates_shader"))
+    )
+    return cl.Program(context, source).build()
+
+
+def upstream_shaders():
+    """Upstream pla_reverse.shaders, skipping the test without the submodule"""
+    if not os.path.isdir(os.path.join(UPSTREAM_DIRECTORY, "pla_reverse")):
+        pytest.skip("pla_reverse submodule is not checked out")
+    sys.path.insert(0, UPSTREAM_DIRECTORY)
+    try:
+        # pylint: disable=import-outside-toplevel
+        from pla_reverse import shaders
+    finally:
+        sys.path.remove(UPSTREAM_DIRECTORY)
+    return shaders
+
+
+def search_inputs(
+    group_seeds: list[int], is_multi_spawner: bool, seed: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Generator seeds of pokemon 1 and sorted fixed seeds of pokemon 2
+    of the planted group seeds, mixed with decoys
+    """
+    rng = random.Random(seed)
+    generator_seeds = [rng.getrandbits(64) for _ in range(DECOYS)]
+    fixed_seeds = [rng.getrandbits(64) for _ in range(DECOYS)]
+    for group_seed in group_seeds:
+        generator_seed, _, _, fixed_seed = spawn(group_seed, is_multi_spawner)
+        generator_seeds.insert(rng.randrange(len(generator_seeds)), generator_seed)
+        fixed_seeds.append(fixed_seed)
+    return (
+        np.array(generator_seeds, np.uint64),
+        np.sort(np.array(fixed_seeds, np.uint64)),
+    )
+
+
+def run_candidates(
+    context_queue,
+    program,
+    generator_seeds: np.ndarray,
+    fixed_seeds: np.ndarray,
+    is_multi_spawner: bool,
+    capacity: int = 1024,
+) -> tuple[int, np.ndarray]:
+    """Run find_group_seeds, returning the count and the sorted stored candidates"""
+    context, queue = context_queue
+    flags = cl.mem_flags
+    count = np.zeros(1, np.uint32)
+    count_buffer = cl.Buffer(
+        context, flags.READ_WRITE | flags.COPY_HOST_PTR, hostbuf=count
+    )
+    results_buffer = cl.Buffer(context, flags.READ_WRITE, capacity * 8)
+    cl.Kernel(program, "find_group_seeds")(
+        queue,
+        (len(generator_seeds),),
+        None,
+        count_buffer,
+        results_buffer,
+        np.uint32(capacity),
+        upload(context, generator_seeds),
+        upload(context, fixed_seeds),
+        np.uint32(len(fixed_seeds)),
+        np.uint32(is_multi_spawner),
+    )
+    cl.enqueue_copy(queue, count, count_buffer)
+    results = np.empty(min(int(count[0]), capacity), np.uint64)
+    if len(results):
+        cl.enqueue_copy(queue, results, results_buffer)
+    return int(count[0]), np.sort(results)
+
+
+def run_upstream(
+    context_queue,
+    generator_seeds: np.ndarray,
+    fixed_seeds: np.ndarray,
+    is_multi_spawner: bool,
+) -> int:
+    """Run upstream's find_group_seed, returning its single result (0 if none)"""
+    context, queue = context_queue
+    program = cl.Program(
+        context,
+        upstream_shaders().build_shader_code(
+            "group_seed_shader", {"IS_MULTISPAWNER": int(is_multi_spawner)}
+        ),
+    ).build()
+    flags = cl.mem_flags
+    result = np.zeros(1, np.uint64)
+    result_buffer = cl.Buffer(
+        context, flags.WRITE_ONLY | flags.COPY_HOST_PTR, hostbuf=result
+    )
+    program.find_group_seed(
+        queue,
+        (len(generator_seeds),),
+        None,
+        result_buffer,
+        upload(context, generator_seeds),
+        upload(context, fixed_seeds),
+        np.int32(len(fixed_seeds)),
+    )
+    cl.enqueue_copy(queue, result, result_buffer)
+    return int(result[0])
+
+
+@pytest.mark.parametrize("is_multi_spawner", (False, True))
+def test_candidates_find_planted_group_seeds(
+    context_queue, candidates_program, is_multi_spawner
+):
+    """find_group_seeds returns exactly the planted group seeds"""
+    rng = random.Random(0x6E0)
+    group_seeds = [rng.getrandbits(64) for _ in range(8)]
+    generator_seeds, fixed_seeds = search_inputs(group_seeds, is_multi_spawner, 1)
+    count, results = run_candidates(
+        context_queue,
+        candidates_program,
+        generator_seeds,
+        fixed_seeds,
+        is_multi_spawner,
+    )
+    assert count == len(group_seeds)
+    np.testing.assert_array_equal(results, np.sort(np.array(group_seeds, np.uint64)))
+
+
+def test_candidates_depend_on_spawner_type(context_queue, candidates_program):
+    """Group seeds planted for one spawner type are not found as the other"""
+    group_seed = random.Random(0x6E1).getrandbits(64)
+    generator_seeds, fixed_seeds = search_inputs([group_seed], True, 2)
+    count, _ = run_candidates(
+        context_queue, candidates_program, generator_seeds, fixed_seeds, False
+    )
+    assert count == 0
+
+
+def test_candidates_overflow_is_counted(context_queue, candidates_program):
+    """Candidates past the capacity are dropped but still counted"""
+    rng = random.Random(0x6E2)
+    group_seeds = [rng.getrandbits(64) for _ in range(32)]
+    generator_seeds, fixed_seeds = search_inputs(group_seeds, True, 3)
+    count, results = run_candidates(
+        context_queue, candidates_program, generator_seeds, fixed_seeds, True, 8
+    )
+    assert count == len(group_seeds)
+    assert len(results) == 8
+    assert set(results.tolist()) <= set(group_seeds)
+
+
+@pytest.mark.parametrize("is_multi_spawner", (False, True))
+def test_upstream_finds_planted_group_seed(context_queue, is_multi_spawner):
+    """Upstream's group_seed_shader finds a group seed planted by the same spawns"""
+    group_seed = random.Random(0x6E3).getrandbits(64)
+    generator_seeds, fixed_seeds = search_inputs([group_seed], is_multi_spawner, 4)
+    assert (
+        run_upstream(context_queue, generator_seeds, fixed_seeds, is_multi_spawner)
+        == group_seed
+    )
+
+
+@pytest.mark.parametrize("is_multi_spawner", (False, True))
+def test_candidates_match_upstream(
+    context_queue, candidates_program, is_multi_spawner
+):
+    """find_group_seeds and upstream's group_seed_shader agree on the same inputs"""
+    # skip before running anything without the submodule
+    upstream_shaders()
+    rng = random.Random(0x6E4)
+    for planted in ([], [rng.getrandbits(64)]):
+        generator_seeds, fixed_seeds = search_inputs(planted, is_multi_spawner, 5)
+        _, results = run_candidates(
+            context_queue,
+            candidates_program,
+            generator_seeds,
+            fixed_seeds,
+            is_multi_spawner,
+        )
+        upstream_result = run_upstream(
+            context_queue, generator_seeds, fixed_seeds, is_multi_spawner
+        )
+        assert results.tolist() == ([upstream_result] if upstream_result else [])
@@ -0,0 +1,77 @@
+"""Tests of the precomputed fixed seed matrix table"""
+
+import importlib.util
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("platformdirs")
+
+PACKAGE_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "pla_reverse_gui"
+)
+UPSTREAM_DIRECTORY = os.path.join(PACKAGE_DIRECTORY, "pla_reverse_main")
+
+
+@pytest.fixture(scope="module")
+def matrix_table():
+    """matrix_table module"""
+    # loaded by path, importing the package requires the upstream submodule
+    spec = importlib.util.spec_from_file_location(
+        "matrix_table", os.path.join(PACKAGE_DIRECTORY, "matrix_table.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize("shiny_rolls", (1, 4, 13, 32))
+def test_matrices_solve_targets(matrix_table, shiny_rolls):
+    """SEED_MAT rows give their target bit and NULL_SPACE rows give no target bits"""
+    seed_mat, null_space, iv_const = matrix_table.compute_matrices(shiny_rolls)
+    assert iv_const == matrix_table.iv_target(0, shiny_rolls)
+    for bit, row in enumerate(seed_mat):
+        target = matrix_table.iv_target(int(row), shiny_rolls)
+        assert target ^ int(iv_const) == 1 << bit
+    for row in null_space:
+        assert matrix_table.iv_target(int(row), shiny_rolls) == iv_const
+
+
+def test_packaged_table_is_current(matrix_table):
+    """The packaged table holds every shiny roll count as computed now"""
+    packaged_table = matrix_table.read_table(matrix_table.PACKAGED_TABLE_PATH)
+    assert matrix_table.tables_equal(packaged_table, matrix_table.build_table())
+
+
+def test_table_round_trip(matrix_table, tmp_path):
+    """A written table reads back unchanged"""
+    table = {1: matrix_table.compute_matrices(1), 26: matrix_table.compute_matrices(26)}
+    path = str(tmp_path / "matrix_table.bin")
+    matrix_table.write_table(path, table)
+    assert matrix_table.tables_equal(matrix_table.read_table(path), table)
+
+
+@pytest.mark.parametrize("shiny_rolls", (1, 13))
+def test_matrices_match_upstream(matrix_table, shiny_rolls):
+    """Upstream's matrices solve the same target vectors as the table's"""
+    if not os.path.isdir(os.path.join(UPSTREAM_DIRECTORY, "pla_reverse")):
+        pytest.skip("pla_reverse submodule is not checked out")
+    sys.path.insert(0, UPSTREAM_DIRECTORY)
+    try:
+        # pylint: disable=import-outside-toplevel
+        from pla_reverse import matrix
+    finally:
+        sys.path.remove(UPSTREAM_DIRECTORY)
+    iv_matrix = matrix.iv_matrix(shiny_rolls)
+    _, null_space, iv_const = matrix_table.compute_matrices(shiny_rolls)
+    assert matrix.vec_to_int(matrix.iv_const(shiny_rolls)) == iv_const
+    for bit, row in enumerate(matrix.generalized_inverse(iv_matrix)):
+        target = matrix_table.iv_target(matrix.vec_to_int(row), shiny_rolls)
+        assert target ^ int(iv_const) == 1 << bit
+    upstream_null_space = [
+        matrix.vec_to_int(row) for row in matrix.nullspace(iv_matrix)
+    ]
+    assert len(upstream_null_space) == len(null_space)
+    for row in upstream_null_space:
+        assert matrix_table.iv_target(row, shiny_rolls) == iv_const
@@ -0,0 +1,51 @@
+"""Tests of the persistent fixed seed result cache"""
+
+import importlib.util
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("platformdirs")
+
+MODULE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "pla_reverse_gui", "result_cache.py"
+)
+
+
+@pytest.fixture
+def result_cache(tmp_path, monkeypatch):
+    """result_cache module storing its entries in a temporary directory"""
+    # loaded by path, importing the package requires the upstream submodule
+    spec = importlib.util.spec_from_file_location("result_cache", MODULE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.setattr(module, "CACHE_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(module, "SETTINGS_PATH", str(tmp_path / "settings.json"))
+    return module
+
+
+def test_round_trip(result_cache):
+    """Saved results are loaded back"""
+    results = np.arange(16, dtype=np.uint64)
+    result_cache.save_results("key", results)
+    np.testing.assert_array_equal(result_cache.load_results("key"), results)
+    assert result_cache.load_results("missing") is None
+
+
+def test_corrupted_entry_is_a_miss(result_cache, tmp_path):
+    """A truncated or garbage entry is a cache miss rather than an error"""
+    (tmp_path / "garbage.npz").write_bytes(b"PK\x03\x04 not a zip file")
+    (tmp_path / "empty.npz").write_bytes(b"")
+    assert result_cache.load_results("garbage") is None
+    assert result_cache.load_results("empty") is None
+
+
+def test_evict_skips_temporary_files(result_cache, tmp_path):
+    """Eviction only removes complete entries, not ones still being written"""
+    temp_path = tmp_path / f"pending.npz.{os.getpid()}.tmp.npz"
+    temp_path.write_bytes(b"\0" * 1024)
+    result_cache.save_results("key", np.arange(1024, dtype=np.uint64))
+    result_cache.evict(0)
+    assert temp_path.exists()
+    assert result_cache.load_results("key") is None